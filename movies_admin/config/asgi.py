@@ -9,9 +9,21 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
+from asgiref.sync import ThreadSensitiveContext
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault(
-    'DJANGO_SETTINGS_MODULE', 'config.settings.production')
+    'DJANGO_SETTINGS_MODULE', 'config.settings.asgi')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+
+async def application(scope, receive, send):
+    """Синхронный код каждого запроса выполняется в своём потоке.
+
+    Без этого Django 3.2 выполняет все синхронные view и middleware в одном общем
+    потоке процесса, и медленный список в админке задерживает остальные запросы.
+    """
+
+    async with ThreadSensitiveContext():
+        await django_application(scope, receive, send)
@@ -0,0 +1,3 @@
+# Пустая схема URL для профиля config.settings.cli: config.urls импортирует админку,
+# которой в этом профиле нет, а проверка URL выполняется при каждой команде.
+urlpatterns = []
@@ -0,0 +1,242 @@
+"""Бэкенд postgresql с пулом соединений внутри процесса и проверкой соединений.
+
+ENGINE = 'config.db_pool'. Настройки в DATABASES[alias]['POOL']:
+MAX_SIZE - размер пула на процесс (0 - без пула, только проверка соединений),
+TIMEOUT - сколько секунд ждать свободное соединение, MAX_LIFETIME - после скольких
+секунд соединение закрывается вместо возврата в пул, HEALTH_CHECK_AFTER - после
+скольких секунд простоя соединение проверяется SELECT 1 перед использованием.
+С пулом CONN_MAX_AGE обычно ставится в 0: соединение возвращается в пул в конце
+запроса, а физическое соединение и search_path из OPTIONS переиспользуются.
+"""
+import collections
+import logging
+import os
+import threading
+import time
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.extras
+from django.db.backends.postgresql import base
+from django.db.utils import OperationalError
+
+log = logging.getLogger(__name__)
+
+POOL_DEFAULTS = {
+    'MAX_SIZE': 0,
+    'TIMEOUT': 10,
+    'MAX_LIFETIME': 1800,
+    'HEALTH_CHECK_AFTER': 30,
+}
+SLOW_WAIT = 1.0
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class Timing:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'total': round(self.total, 6),
+            'avg': round(self.total / self.count, 6) if self.count else None,
+            'max': round(self.max, 6),
+        }
+
+
+def is_alive(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def close_quietly(connection):
+    try:
+        connection.close()
+    except psycopg2.Error:
+        pass
+
+
+class ConnectionPool:
+    """Пул соединений psycopg2 ограниченного размера.
+
+    Если все соединения заняты, checkout ждёт до timeout секунд. Время ожидания и
+    время, на которое соединение было взято, накапливаются в статистике.
+    """
+
+    def __init__(self, connect, max_size, timeout, max_lifetime, health_check_after):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_after = health_check_after
+        self.slots = threading.BoundedSemaphore(max_size)
+        self.lock = threading.Lock()
+        self.idle = collections.deque()
+        self.busy = {}
+        self.wait = Timing()
+        self.hold = Timing()
+        self.counters = collections.Counter()
+
+    def checkout(self):
+        started = time.monotonic()
+        if not self.slots.acquire(timeout=self.timeout):
+            self.counters['timeouts'] += 1
+            raise PoolTimeout(f'Нет свободного соединения в пуле за {self.timeout} с')
+        try:
+            connection, created_at = self.take_idle()
+            if connection is None:
+                connection, created_at = self.connect(), time.monotonic()
+                self.counters['created'] += 1
+        except Exception:
+            self.slots.release()
+            raise
+        now = time.monotonic()
+        waited = now - started
+        with self.lock:
+            self.wait.observe(waited)
+            self.busy[id(connection)] = (created_at, now)
+        if waited > SLOW_WAIT:
+            log.warning('Ожидание соединения из пула %.2f с', waited)
+        return connection
+
+    def take_idle(self):
+        while True:
+            with self.lock:
+                if not self.idle:
+                    return None, None
+                connection, created_at, returned_at = self.idle.pop()
+            now = time.monotonic()
+            if connection.closed or now - created_at > self.max_lifetime:
+                close_quietly(connection)
+                self.counters['expired'] += 1
+                continue
+            if now - returned_at > self.health_check_after and not is_alive(connection):
+                close_quietly(connection)
+                self.counters['broken'] += 1
+                continue
+            self.counters['reused'] += 1
+            return connection, created_at
+
+    def checkin(self, connection):
+        now = time.monotonic()
+        with self.lock:
+            created_at, checked_out_at = self.busy.pop(id(connection))
+            self.hold.observe(now - checked_out_at)
+        try:
+            if not connection.closed and self.reset(connection) and now - created_at <= self.max_lifetime:
+                with self.lock:
+                    self.idle.append((connection, created_at, now))
+            else:
+                close_quietly(connection)
+                self.counters['discarded'] += 1
+        finally:
+            self.slots.release()
+
+    @staticmethod
+    def reset(connection):
+        """Откатывает незавершённую транзакцию; False, если соединение непригодно"""
+
+        status = connection.get_transaction_status()
+        if status == psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            return True
+        if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        try:
+            connection.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    def stats(self):
+        with self.lock:
+            idle, busy = len(self.idle), len(self.busy)
+        return {
+            'max_size': self.max_size,
+            'idle': idle,
+            'busy': busy,
+            'wait': self.wait.as_dict(),
+            'hold': self.hold.as_dict(),
+            **self.counters,
+        }
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool_options = {**POOL_DEFAULTS, **self.settings_dict.get('POOL', {})}
+        self.checked_at = None
+
+    def get_pool(self, conn_params):
+        key = (self.alias, os.getpid())
+        with pools_lock:
+            if key not in pools:
+                pools[key] = ConnectionPool(
+                    lambda: self.connect_raw(conn_params),
+                    self.pool_options['MAX_SIZE'],
+                    self.pool_options['TIMEOUT'],
+                    self.pool_options['MAX_LIFETIME'],
+                    self.pool_options['HEALTH_CHECK_AFTER'],
+                )
+            return pools[key]
+
+    def get_pool_stats(self):
+        pool = pools.get((self.alias, os.getpid()))
+        return pool.stats() if pool is not None else {'max_size': 0}
+
+    def connect_raw(self, conn_params):
+        connection = base.Database.connect(**conn_params)
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        if isolation_level is not None and isolation_level != connection.isolation_level:
+            connection.set_session(isolation_level=isolation_level)
+        psycopg2.extras.register_default_jsonb(conn_or_curs=connection, loads=lambda x: x)
+        return connection
+
+    def get_new_connection(self, conn_params):
+        if not self.pool_options['MAX_SIZE']:
+            connection = super().get_new_connection(conn_params)
+        else:
+            connection = self.get_pool(conn_params).checkout()
+            self.isolation_level = self.settings_dict['OPTIONS'].get('isolation_level', connection.isolation_level)
+        self.checked_at = time.monotonic()
+        return connection
+
+    def _close(self):
+        if self.connection is None or not self.pool_options['MAX_SIZE']:
+            return super()._close()
+        self.get_pool(self.get_connection_params()).checkin(self.connection)
+
+    def close_if_unusable_or_obsolete(self):
+        """Кроме проверок Django, пингует соединение, простоявшее дольше HEALTH_CHECK_AFTER.
+
+        Вызывается в начале и в конце каждого запроса, поэтому постоянное соединение
+        (CONN_MAX_AGE > 0), которое оборвалось за время простоя, закрывается до того,
+        как запрос упадёт на нём.
+        """
+
+        super().close_if_unusable_or_obsolete()
+        if self.connection is None or self.in_atomic_block:
+            return
+        now = time.monotonic()
+        if self.checked_at is not None and now - self.checked_at > self.pool_options['HEALTH_CHECK_AFTER']:
+            if not self.is_usable():
+                self.close()
+                return
+        self.checked_at = now
@@ -0,0 +1,9 @@
+from .production import *
+
+# Синхронная часть каждого запроса выполняется в отдельном потоке, который завершается
+# вместе с запросом, поэтому постоянные соединения не переиспользуются: соединение
+# возвращается в пул config.db_pool в конце запроса.
+DATABASES['default']['CONN_MAX_AGE'] = 0
+DATABASES['default']['POOL']['MAX_SIZE'] = int(os.environ.get('DB_POOL_MAX_SIZE') or 20)
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    DATABASES['default']['ENGINE'] = 'config.db_pool'
@@ -23,6 +23,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'movies.middleware.QueryMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,6 +60,13 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'movies-admin'),
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -90,3 +98,33 @@ STATIC_URL = '/static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 ADMINS_ROWS_PER_PAGE = 20
+
+AUTOCOMPLETE_CACHE_TIMEOUT = 300
+
+ADMIN_CACHE_ALIAS = 'default'
+
+ADMIN_CACHE_TIMEOUT = 300
+
+METRICS_SAMPLE_RATE = float(os.getenv('METRICS_SAMPLE_RATE') or 0.1)
+
+METRICS_DUPLICATE_THRESHOLD = int(os.getenv('METRICS_DUPLICATE_THRESHOLD', 5))
+
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+API_TOKEN = os.getenv('API_TOKEN')
+
+SQLITE_TO_POSTGRES_DIR = os.getenv('SQLITE_TO_POSTGRES_DIR') or str(BASE_DIR.parent.parent / 'sqlite_to_postgres')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'metrics': {'class': 'logging.StreamHandler', 'formatter': 'message'},
+    },
+    'loggers': {
+        'movies.metrics': {'handlers': ['metrics'], 'level': 'INFO', 'propagate': False},
+    },
+}
@@ -0,0 +1,20 @@
+from .production import *
+
+# Профиль для management-команд из cron, проверок здоровья и воркеров: без админки,
+# статики, сообщений, шаблонов, middleware и переводов, которые нужны только
+# обработке HTTP-запросов. migrate и createsuperuser запускаются с полным профилем.
+CLI_EXCLUDED_APPS = (
+    'django.contrib.admin',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+)
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in CLI_EXCLUDED_APPS]
+
+MIDDLEWARE = []
+
+TEMPLATES = []
+
+ROOT_URLCONF = 'config.cli_urls'
+
+USE_I18N = False
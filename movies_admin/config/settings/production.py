@@ -10,6 +10,13 @@ DATABASES = {
         'PORT': os.environ.get('DB_PORT', 5432),
         'OPTIONS': {
            'options': '-c search_path=public,content'
-        }
+        },
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'POOL': {
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 0)),
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            'MAX_LIFETIME': int(os.environ.get('DB_POOL_MAX_LIFETIME', 1800)),
+            'HEALTH_CHECK_AFTER': int(os.environ.get('DB_HEALTH_CHECK_AFTER', 30)),
+        },
     }
 }
\ No newline at end of file
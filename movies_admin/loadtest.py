@@ -0,0 +1,178 @@
+"""Нагрузочный тест админки: пропускная способность под WSGI и под ASGI.
+
+По умолчанию поднимает два сервера gunicorn с одинаковым числом процессов:
+синхронные воркеры с config.wsgi и воркеры uvicorn с config.asgi, - логинится
+в админку и из --concurrency потоков в течение --duration секунд запрашивает
+--path по кругу. Для каждого сервера выводятся запросы в секунду, ошибки и
+перцентили времени ответа. С --wsgi-url и --asgi-url сервера не поднимаются,
+тестируются уже запущенные.
+
+python loadtest.py --username admin --password admin --workers 2 --concurrency 32
+"""
+import argparse
+import http.client
+import http.cookiejar
+import os
+import re
+import shutil
+import socket
+import subprocess
+import threading
+import time
+import urllib.parse
+import urllib.request
+from contextlib import closing
+
+DEFAULT_PATHS = (
+    '/admin/lookup/autocomplete/person/?term=jo',
+    '/admin/lookup/export/filmwork/?limit=100',
+    '/admin/movies/filmwork/',
+)
+SERVERS = {
+    'wsgi': ['config.wsgi:application'],
+    'asgi': ['config.asgi:application', '-k', 'uvicorn.workers.UvicornWorker'],
+}
+START_TIMEOUT = 30
+
+
+def free_port():
+    with closing(socket.socket()) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, process):
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'Сервер завершился с кодом {process.returncode}')
+        try:
+            with closing(socket.create_connection(('127.0.0.1', port), timeout=1)):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Сервер не ответил на порту {port} за {START_TIMEOUT} с')
+
+
+def start_server(mode, workers):
+    gunicorn = shutil.which('gunicorn')
+    if gunicorn is None:
+        raise RuntimeError('gunicorn не найден, установите зависимости из requirements.txt')
+    port = free_port()
+    command = [
+        gunicorn, *SERVERS[mode], '-w', str(workers),
+        '-b', f'127.0.0.1:{port}', '--log-level', 'warning',
+    ]
+    process = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)))
+    wait_for_port(port, process)
+    return process, f'http://127.0.0.1:{port}'
+
+
+def login(base_url, username, password):
+    """Входит через форму админки и возвращает заголовок Cookie с сессией"""
+
+    jar = http.cookiejar.CookieJar()
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+    with opener.open(f'{base_url}/admin/login/') as response:
+        page = response.read().decode()
+    token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', page).group(1)
+    data = urllib.parse.urlencode({
+        'username': username, 'password': password, 'csrfmiddlewaretoken': token, 'next': '/admin/',
+    }).encode()
+    opener.open(urllib.request.Request(f'{base_url}/admin/login/', data=data, headers={'Referer': base_url})).read()
+    if not any(cookie.name == 'sessionid' for cookie in jar):
+        raise RuntimeError('Не удалось войти в админку, проверьте --username и --password')
+    return '; '.join(f'{cookie.name}={cookie.value}' for cookie in jar)
+
+
+def client(base_url, cookie, paths, deadline, latencies, errors, lock):
+    """Один поток нагрузки с keep-alive соединением"""
+
+    host = urllib.parse.urlsplit(base_url).netloc
+    connection = http.client.HTTPConnection(host, timeout=60)
+    own_latencies, own_errors, index = [], 0, 0
+    while time.monotonic() < deadline:
+        path = paths[index % len(paths)]
+        index += 1
+        started = time.perf_counter()
+        try:
+            connection.request('GET', path, headers={'Cookie': cookie})
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                own_errors += 1
+        except (OSError, http.client.HTTPException):
+            own_errors += 1
+            connection.close()
+            connection = http.client.HTTPConnection(host, timeout=60)
+            continue
+        own_latencies.append(time.perf_counter() - started)
+    connection.close()
+    with lock:
+        latencies.extend(own_latencies)
+        errors[0] += own_errors
+
+
+def percentile(values, share):
+    return values[min(int(len(values) * share), len(values) - 1)] if values else 0.0
+
+
+def run(base_url, cookie, paths, concurrency, duration):
+    latencies, errors, lock = [], [0], threading.Lock()
+    deadline = time.monotonic() + duration
+    threads = [
+        threading.Thread(target=client, args=(base_url, cookie, paths, deadline, latencies, errors, lock))
+        for _ in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': len(latencies) / elapsed,
+        'p50': percentile(latencies, 0.5),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Сравнение WSGI и ASGI под нагрузкой')
+    parser.add_argument('--username', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--path', action='append', dest='paths', help='URL для нагрузки, можно несколько раз')
+    parser.add_argument('--concurrency', type=int, default=32, help='число одновременных клиентов')
+    parser.add_argument('--duration', type=float, default=15, help='длительность прогона, с')
+    parser.add_argument('--workers', type=int, default=2, help='процессов gunicorn на сервер')
+    parser.add_argument('--wsgi-url', help='уже запущенный WSGI-сервер')
+    parser.add_argument('--asgi-url', help='уже запущенный ASGI-сервер')
+    args = parser.parse_args()
+    paths = args.paths or list(DEFAULT_PATHS)
+    urls = {'wsgi': args.wsgi_url, 'asgi': args.asgi_url}
+
+    print(f'{"server":>6} {"requests":>9} {"errors":>7} {"req/s":>8} {"p50, ms":>8} {"p95, ms":>8} {"p99, ms":>8}')
+    for mode in ('wsgi', 'asgi'):
+        process = None
+        base_url = urls[mode]
+        if base_url is None:
+            process, base_url = start_server(mode, args.workers)
+        try:
+            cookie = login(base_url, args.username, args.password)
+            stats = run(base_url, cookie, paths, args.concurrency, args.duration)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+        print(
+            f'{mode:>6} {stats["requests"]:>9} {stats["errors"]:>7} {stats["rps"]:>8.1f} '
+            f'{stats["p50"] * 1000:>8.1f} {stats["p95"] * 1000:>8.1f} {stats["p99"] * 1000:>8.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
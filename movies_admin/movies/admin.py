@@ -1,11 +1,25 @@
 from django.contrib import admin
-from .models import Filmwork, FilmworkGenre, Person, PersonRole, Genre
+from django.contrib.admin.utils import unquote
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+
+from .autocomplete import LookupAutocompleteMixin
+from .bulk import BulkInlineFormSet, create_persons, sync_cast
+from .filmography import get_filmography
+from .forms import CastImportForm
+from .models import Filmwork, FilmworkAggregate, FilmworkGenre, Person, PersonRole, Genre
+from .pagination import KeysetPaginationMixin
+from .search import IndexedSearchMixin
 
 ROWS_PER_PAGE = 20
 
 
-class GenreInline(admin.TabularInline):
+class GenreInline(LookupAutocompleteMixin, admin.TabularInline):
     model = FilmworkGenre
+    formset = BulkInlineFormSet
     extra = 0
     verbose_name = 'Жанр'
     autocomplete_fields = ('genre',)
@@ -14,8 +28,9 @@ class GenreInline(admin.TabularInline):
         return super().get_queryset(request).select_related('genre', 'filmwork')
 
 
-class PersonRoleInline(admin.TabularInline):
+class PersonRoleInline(LookupAutocompleteMixin, admin.TabularInline):
     model = PersonRole
+    formset = BulkInlineFormSet
     extra = 0
     verbose_name = 'Роль'
     autocomplete_fields = ('person',)
@@ -26,10 +41,15 @@ class PersonRoleInline(admin.TabularInline):
 
 
 @admin.register(Filmwork)
-class FilmworkAdmin(admin.ModelAdmin):
+class FilmworkAdmin(KeysetPaginationMixin, IndexedSearchMixin, admin.ModelAdmin):
     list_filter = ('type',)
     search_fields = ('title', 'description', 'id')
-    list_display = ('title', 'type', 'creation_date', 'rating')
+    search_vector_field = 'search_vector'
+    search_trigram_fields = ('title',)
+    list_display = (
+        'title', 'type', 'creation_date', 'rating', 'genres', 'actors_count', 'directors_count', 'writers_count'
+    )
+    list_select_related = ('aggregate',)
     fields = (
         'title', 'type', 'description', 'creation_date', 'certificate',
         'file_path', 'rating'
@@ -42,10 +62,80 @@ class FilmworkAdmin(admin.ModelAdmin):
     ordering = ('title',)
     list_per_page = ROWS_PER_PAGE
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('search_vector')
+
+    def get_urls(self):
+        return [
+            path(
+                '<path:object_id>/cast/import/',
+                self.admin_site.admin_view(self.cast_import_view),
+                name='movies_filmwork_cast_import',
+            ),
+            *super().get_urls(),
+        ]
+
+    def cast_import_view(self, request, object_id):
+        obj = self.get_object(request, unquote(object_id))
+        if obj is None:
+            return self._get_obj_does_not_exist_redirect(request, self.model._meta, object_id)
+        if not self.has_change_permission(request, obj):
+            raise PermissionDenied
+
+        form = CastImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            persons = form.cleaned_data['persons']
+            with transaction.atomic():
+                missing = form.cleaned_data['missing']
+                if missing:
+                    persons.update(zip(missing, (person.pk for person in create_persons(missing))))
+                added, removed = sync_cast(
+                    obj, [(persons[name], role) for name, role in form.cleaned_data['entries']],
+                    replace=form.cleaned_data['replace'],
+                )
+            message = f'Импорт состава: добавлено {added}, удалено {removed}, новых персон {len(missing)}'
+            self.log_change(request, obj, message)
+            self.message_user(request, message)
+            return redirect(reverse('admin:movies_filmwork_change', args=[obj.pk]))
+
+        context = {
+            **self.admin_site.each_context(request),
+            'title': f'Импорт состава: {obj}',
+            'opts': self.model._meta,
+            'original': obj,
+            'form': form,
+        }
+        return TemplateResponse(request, 'admin/movies/filmwork/cast_import.html', context)
+
+    @staticmethod
+    def get_aggregate(obj):
+        try:
+            return obj.aggregate
+        except FilmworkAggregate.DoesNotExist:
+            return FilmworkAggregate()
+
+    @admin.display(description='Жанры', ordering='aggregate__genres')
+    def genres(self, obj):
+        return self.get_aggregate(obj).genres or None
+
+    @admin.display(description='Актёров', ordering='aggregate__actors_count')
+    def actors_count(self, obj):
+        return self.get_aggregate(obj).actors_count
+
+    @admin.display(description='Режиссёров', ordering='aggregate__directors_count')
+    def directors_count(self, obj):
+        return self.get_aggregate(obj).directors_count
+
+    @admin.display(description='Сценаристов', ordering='aggregate__writers_count')
+    def writers_count(self, obj):
+        return self.get_aggregate(obj).writers_count
+
 
 @admin.register(Person)
-class PersonAdmin(admin.ModelAdmin):
+class PersonAdmin(KeysetPaginationMixin, IndexedSearchMixin, admin.ModelAdmin):
     search_fields = ('full_name', 'birth_date', 'id')
+    search_trigram_fields = ('full_name',)
+    search_date_fields = ('birth_date',)
     list_display = (
         'full_name', 'birth_date', 'created_at', 'updated_at'
     )
@@ -53,9 +143,15 @@ class PersonAdmin(admin.ModelAdmin):
     ordering = ('full_name',)
     list_per_page = ROWS_PER_PAGE
 
+    def render_change_form(self, request, context, add=False, change=False, form_url='', obj=None):
+        # вызывается после проверки прав и поиска объекта и только при выводе формы
+        if obj is not None:
+            context['filmography'] = get_filmography(request, obj.pk)
+        return super().render_change_form(request, context, add, change, form_url, obj)
+
 
 @admin.register(Genre)
-class GenreAdmin(admin.ModelAdmin):
+class GenreAdmin(KeysetPaginationMixin, admin.ModelAdmin):
     search_fields = ('name',)
     list_display = (
         'name', 'description', 'created_at', 'updated_at'
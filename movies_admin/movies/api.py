@@ -0,0 +1,87 @@
+import hashlib
+
+from django.db.models import Count, Max, Prefetch
+
+from .models import Filmwork, FilmworkGenre, Genre, PersonRole, RoleType
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+FILM_FIELDS = ('id', 'title', 'description', 'creation_date', 'rating', 'type', 'created_at', 'updated_at')
+
+
+def films_queryset():
+    """Фильмы с жанрами и составом: три запроса на страницу независимо от её размера"""
+
+    return Filmwork.objects.only(*FILM_FIELDS).prefetch_related(
+        Prefetch('genres', queryset=Genre.objects.only('id', 'name').order_by('name')),
+        Prefetch(
+            'personrole_set',
+            queryset=PersonRole.objects.select_related('person').only(
+                'filmwork_id', 'role', 'person__id', 'person__full_name'
+            ).order_by('person__full_name', 'person_id'),
+        ),
+    )
+
+
+def page_queryset(after, limit):
+    queryset = Filmwork.objects.order_by('id')
+    if after is not None:
+        queryset = queryset.filter(id__gt=after)
+    return queryset[:limit + 1]
+
+
+def serialize_film(film):
+    persons = {role: [] for role in RoleType.values}
+    for credit in film.personrole_set.all():
+        persons.setdefault(credit.role, []).append({'id': credit.person.id, 'full_name': credit.person.full_name})
+    return {
+        **{field: getattr(film, field) for field in FILM_FIELDS},
+        'genres': [{'id': genre.id, 'name': genre.name} for genre in film.genres.all()],
+        'persons': persons,
+    }
+
+
+def films_page(after, limit):
+    """Страница фильмов по возрастанию id после after и признак следующей страницы"""
+
+    films = list(films_queryset().filter(id__in=page_queryset(after, limit).values('id')).order_by('id'))
+    return [serialize_film(film) for film in films[:limit]], len(films) > limit
+
+
+def film_detail(pk):
+    film = films_queryset().filter(pk=pk).first()
+    return serialize_film(film) if film is not None else None
+
+
+def films_etag(films):
+    """ETag набора фильмов из трёх небольших агрегирующих запросов.
+
+    Учитывает updated_at фильмов, жанров и персон, время создания связей и число
+    связей: удаление связи не меняет ни одной отметки времени, но меняет число.
+    Связи с жанрами и с персонами агрегируются отдельно, поэтому читается столько
+    строк, сколько связей, а не их произведение.
+    """
+
+    state = films.aggregate(films=Count('id'), film_updated=Max('updated_at'))
+    if not state['films']:
+        return None
+    film_ids = films.values('id')
+    state.update(FilmworkGenre.objects.filter(filmwork__in=film_ids).aggregate(
+        genre_links=Count('id'),
+        genre_links_created=Max('created_at'),
+        genre_updated=Max('genre__updated_at'),
+    ))
+    state.update(PersonRole.objects.filter(filmwork__in=film_ids).aggregate(
+        person_links=Count('id'),
+        person_links_created=Max('created_at'),
+        person_updated=Max('person__updated_at'),
+    ))
+    return hashlib.md5(repr(sorted(state.items())).encode()).hexdigest()
+
+
+def page_etag(after, limit):
+    return films_etag(Filmwork.objects.filter(id__in=page_queryset(after, limit).values('id')))
+
+
+def detail_etag(pk):
+    return films_etag(Filmwork.objects.filter(pk=pk))
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('films/', views.films, name='films'),
+    path('films/<uuid:pk>/', views.film, name='film'),
+]
@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Lower
+from django.urls import reverse
+
+from .caching import read_through
+from .models import Genre, Person
+
+AUTOCOMPLETE_FIELDS = {
+    'genre': (Genre, 'name'),
+    'person': (Person, 'full_name'),
+}
+PAGE_SIZE = 20
+TRIGRAM_MIN_LENGTH = 3
+
+
+def search(model_name, term, page):
+    """Страница подсказок [(id, подпись)] и признак следующей страницы.
+
+    Совпадения по началу строки (индекс lower(label) text_pattern_ops) идут первыми,
+    за ними совпадения внутри строки (индекс gin_trgm_ops), если запрос не короче
+    TRIGRAM_MIN_LENGTH символов.
+    """
+
+    model, label = AUTOCOMPLETE_FIELDS[model_name]
+    queryset = model.objects.alias(label_lower=Lower(label))
+    term = term.lower()
+    if term:
+        query = Q(label_lower__startswith=term)
+        if len(term) >= TRIGRAM_MIN_LENGTH:
+            query |= Q(**{f'{label}__trigram_icontains': term})
+        queryset = queryset.filter(query).annotate(
+            is_prefix=Case(When(label_lower__startswith=term, then=Value(0)), default=Value(1),
+                           output_field=IntegerField())
+        ).order_by('is_prefix', label, 'id')
+    else:
+        queryset = queryset.order_by(label, 'id')
+    offset = (page - 1) * PAGE_SIZE
+    rows = list(queryset.values_list('id', label)[offset:offset + PAGE_SIZE + 1])
+    return [(str(pk), text) for pk, text in rows[:PAGE_SIZE]], len(rows) > PAGE_SIZE
+
+
+def cached_search(model_name, term, page):
+    """Кеш подсказок по запросу; сбрасывается при сохранении любой записи модели"""
+
+    return read_through(
+        'autocomplete', [model_name], (term.lower(), page), lambda: search(model_name, term, page),
+        settings.AUTOCOMPLETE_CACHE_TIMEOUT,
+    )
+
+
+class LookupSelect(AutocompleteSelect):
+    """Виджет autocomplete, который ходит в movies:autocomplete вместо admin:autocomplete.
+
+    Если formset заранее положил подписи выбранных значений в known_labels, виджет
+    не делает запрос за ними при отрисовке.
+    """
+
+    known_labels = {}
+
+    def get_url(self):
+        return reverse('movies:autocomplete', args=[self.field.remote_field.model._meta.model_name])
+
+    def optgroups(self, name, value, attr=None):
+        selected = [str(v) for v in value if str(v) not in self.choices.field.empty_values]
+        if not selected or any(v not in self.known_labels for v in selected):
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required and not self.allow_multiple_selected:
+            options.append(self.create_option(name, '', '', False, 0))
+        for option_value in selected:
+            options.append(self.create_option(name, option_value, self.known_labels[option_value], True, len(options)))
+        return [(None, options, 0)]
+
+
+class LookupAutocompleteMixin:
+    """Для полей из autocomplete_fields с моделью из AUTOCOMPLETE_FIELDS ставит LookupSelect"""
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        model_name = db_field.remote_field.model._meta.model_name
+        if db_field.name in self.get_autocomplete_fields(request) and model_name in AUTOCOMPLETE_FIELDS:
+            kwargs.setdefault('widget', LookupSelect(db_field, self.admin_site, using=kwargs.get('using')))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
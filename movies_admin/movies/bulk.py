@@ -0,0 +1,84 @@
+from django.db import router, transaction
+
+from .caching import CachedInlineFormSet, bump_version, instance_namespace
+from .models import Filmwork, Person, PersonRole
+
+
+def touch_auto_now(obj):
+    """Обновляет поля auto_now, которые bulk_update сам не трогает, и возвращает их имена"""
+
+    fields = [field for field in obj._meta.concrete_fields if getattr(field, 'auto_now', False)]
+    for field in fields:
+        field.pre_save(obj, add=False)
+    return {field.name for field in fields}
+
+
+class BulkInlineFormSet(CachedInlineFormSet):
+    """Inline formset, который сохраняет строки пачкой вместо запроса на каждую форму.
+
+    Неизменённые строки не трогаются, удалённые удаляются одним DELETE, изменённые -
+    одним bulk_update, новые - одним bulk_create, всё в одной транзакции.
+    new_objects, changed_objects и deleted_objects заполняются как у обычного
+    formset, поэтому журнал изменений админки не меняется. Пакетные запросы не шлют
+    сигналы моделей, поэтому кеш строк родителя сбрасывается здесь же.
+    """
+
+    def save(self, commit=True):
+        if not commit:
+            return super().save(commit=False)
+        super().save(commit=False)
+
+        model = self.model
+        field_names = {field.name for field in model._meta.concrete_fields}
+        changed = [obj for obj, _ in self.changed_objects]
+        update_fields = set()
+        for obj, changed_data in self.changed_objects:
+            update_fields.update(name for name in changed_data if name in field_names)
+            update_fields.update(touch_auto_now(obj))
+
+        with transaction.atomic(using=router.db_for_write(model)):
+            if self.deleted_objects:
+                model.objects.filter(pk__in=[obj.pk for obj in self.deleted_objects]).delete()
+            if changed:
+                model.objects.bulk_update(changed, sorted(update_fields))
+            if self.new_objects:
+                model.objects.bulk_create(self.new_objects)
+        if self.deleted_objects or changed or self.new_objects:
+            bump_version(instance_namespace(self.instance, self.instance.pk))
+        return changed + self.new_objects
+
+
+def create_persons(names):
+    """Создаёт персоны пачкой; bulk_create не шлёт post_save, поэтому кеш персон сбрасывается явно"""
+
+    persons = Person.objects.bulk_create([Person(full_name=name) for name in names])
+    bump_version('person')
+    return persons
+
+
+def sync_cast(filmwork, credits, replace=False):
+    """Приводит состав фильма к набору credits из пар (person_id, role).
+
+    Отсутствующие пары добавляются одним bulk_create. При replace пары, которых нет
+    в credits, удаляются одним DELETE. Совпадающие строки не перезаписываются.
+    Возвращает число добавленных и удалённых строк.
+    """
+
+    wanted = dict.fromkeys(credits)
+    with transaction.atomic(using=router.db_for_write(PersonRole)):
+        existing = {
+            (person_id, role): pk
+            for pk, person_id, role in PersonRole.objects.filter(filmwork=filmwork).values_list(
+                'pk', 'person_id', 'role'
+            ).select_for_update()
+        }
+        removed = [pk for credit, pk in existing.items() if credit not in wanted] if replace else []
+        if removed:
+            PersonRole.objects.filter(pk__in=removed).delete()
+        added = PersonRole.objects.bulk_create([
+            PersonRole(filmwork=filmwork, person_id=person_id, role=role)
+            for person_id, role in wanted if (person_id, role) not in existing
+        ])
+    if added or removed:
+        bump_version(instance_namespace(Filmwork, filmwork.pk))
+    return len(added), len(removed)
@@ -0,0 +1,166 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.forms.models import BaseInlineFormSet
+
+from .models import Filmwork, FilmworkGenre, Genre, Person, PersonRole
+
+STATS_NAMES = ('autocomplete', 'count', 'inline')
+MISSING = object()
+
+
+def get_cache():
+    return caches[settings.ADMIN_CACHE_ALIAS]
+
+
+def is_shared_cache():
+    """Кеш общий для всех процессов: у LocMemCache своя копия в каждом процессе"""
+
+    return not isinstance(get_cache(), LocMemCache)
+
+
+def version_key(namespace):
+    return f'version:{namespace}'
+
+
+def get_versions(namespaces):
+    """Текущие версии пространств имён; отсутствующие заводятся с версией 1"""
+
+    cache = get_cache()
+    keys = [version_key(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, 1, None)
+            versions[key] = cache.get(key, 1)
+    return [versions[key] for key in keys]
+
+
+def bump_version(*namespaces):
+    """Новая версия делает недействительными все ключи, собранные с этим пространством имён"""
+
+    cache = get_cache()
+    for namespace in namespaces:
+        key = version_key(namespace)
+        cache.add(key, 1, None)
+        cache.incr(key)
+
+
+def make_key(name, namespaces, *parts):
+    versions = '.'.join(str(version) for version in get_versions(namespaces))
+    digest = hashlib.md5(repr(parts).encode()).hexdigest()
+    return f'{name}:{versions}:{digest}'
+
+
+def record(name, outcome):
+    cache = get_cache()
+    key = f'stats:{name}:{outcome}'
+    cache.add(key, 0, None)
+    cache.incr(key)
+
+
+def read_through(name, namespaces, parts, compute, timeout=None):
+    """Значение из кеша или, при промахе, результат compute(), который сохраняется в кеш.
+
+    Ключ строится из name, версий namespaces и parts, поэтому после bump_version
+    любого из пространств имён старые значения больше не читаются и истекают сами.
+    """
+
+    cache = get_cache()
+    key = make_key(name, namespaces, *parts)
+    value = cache.get(key, MISSING)
+    if value is MISSING:
+        record(name, 'miss')
+        value = compute()
+        cache.set(key, value, settings.ADMIN_CACHE_TIMEOUT if timeout is None else timeout)
+    else:
+        record(name, 'hit')
+    return value
+
+
+def get_stats():
+    cache = get_cache()
+    counters = cache.get_many([f'stats:{name}:{outcome}' for name in STATS_NAMES for outcome in ('hit', 'miss')])
+    stats = {}
+    for name in STATS_NAMES:
+        hits, misses = counters.get(f'stats:{name}:hit', 0), counters.get(f'stats:{name}:miss', 0)
+        total = hits + misses
+        stats[name] = {'hit': hits, 'miss': misses, 'hit_ratio': round(hits / total, 3) if total else None}
+    return stats
+
+
+def instance_namespace(model, pk):
+    return f'{model._meta.model_name}:{pk}'
+
+
+class CachedInlineFormSet(BaseInlineFormSet):
+    """Inline formset, который берёт строки несвязанной формы из кеша.
+
+    Ключ зависит от версии родительского объекта и версий моделей, на которые
+    ссылаются строки, поэтому изменение самих строк, родителя или, например,
+    переименование персоны сбрасывает кеш. Связанные формы (POST) всегда читают
+    базу. Подписи выбранных значений передаются виджетам с known_labels, чтобы
+    те не запрашивали их по одной строке.
+
+    С кешем в памяти процесса строки не кешируются: сброс версий виден только
+    процессу, который сохранил изменения, и остальные воркеры показывали бы
+    старые строки до истечения таймаута.
+    """
+
+    def get_namespaces(self):
+        return [
+            instance_namespace(self.instance, self.instance.pk),
+            *(
+                field.related_model._meta.model_name for field in self.model._meta.concrete_fields
+                if field.is_relation and field != self.fk
+            ),
+        ]
+
+    def get_queryset(self):
+        if hasattr(self, '_queryset') or self.is_bound or self.instance.pk is None or not is_shared_cache():
+            return super().get_queryset()
+        queryset = super().get_queryset()
+        queryset._result_cache = read_through(
+            'inline', self.get_namespaces(), (self.model._meta.label, str(self.instance.pk)), lambda: list(queryset)
+        )
+        queryset._prefetch_done = True
+        return queryset
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        if self.is_bound or index is None or index >= self.initial_form_count():
+            return
+        for field in self.model._meta.concrete_fields:
+            if not field.is_relation or field == self.fk or field.name not in form.fields:
+                continue
+            widget = form.fields[field.name].widget
+            widget = getattr(widget, 'widget', widget)
+            related = getattr(form.instance, field.name, None)
+            if hasattr(widget, 'known_labels') and related is not None:
+                widget.known_labels = {str(related.pk): str(related)}
+
+
+@receiver(post_save, sender=Filmwork)
+@receiver(post_delete, sender=Filmwork)
+def invalidate_filmwork(sender, instance, **kwargs):
+    bump_version('filmwork', instance_namespace(Filmwork, instance.pk))
+
+
+@receiver(post_save, sender=FilmworkGenre)
+@receiver(post_delete, sender=FilmworkGenre)
+@receiver(post_save, sender=PersonRole)
+@receiver(post_delete, sender=PersonRole)
+def invalidate_filmwork_links(sender, instance, **kwargs):
+    bump_version(instance_namespace(Filmwork, instance.filmwork_id))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Person)
+@receiver(post_delete, sender=Person)
+def invalidate_model(sender, **kwargs):
+    bump_version(sender._meta.model_name)
@@ -0,0 +1,115 @@
+"""Лента изменений фильмов из content.film_work_change.
+
+Триггеры пишут в таблицу id фильма при изменении самого фильма, его жанров и
+состава, а также при переименовании жанра или персоны. Позиция в ленте - пара
+(txid, seq): номер транзакции и номер записи. Читаются только записи
+транзакций, которые старше всех ещё не завершённых (pg_snapshot_xmin), поэтому
+запись с меньшей позицией не может появиться позже уже прочитанной и курсор
+ничего не пропускает. Долгая открытая транзакция задерживает ленту, пока не
+завершится.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List
+from uuid import UUID
+
+from django.db import connections
+
+FETCH_SQL = '''
+SELECT txid::text, seq, film_work_id, source, operation, changed_at
+FROM content.film_work_change
+WHERE (txid, seq) > (%s::text::xid8, %s)
+  AND txid < pg_snapshot_xmin(pg_current_snapshot())
+ORDER BY film_work_change.txid, film_work_change.seq
+LIMIT %s
+'''
+HEAD_SQL = 'SELECT pg_snapshot_xmin(pg_current_snapshot())::text'
+PRUNE_SQL = '''
+DELETE FROM content.film_work_change
+WHERE changed_at < %s AND txid < pg_snapshot_xmin(pg_current_snapshot())
+'''
+
+
+@dataclass(frozen=True, order=True)
+class Cursor:
+    txid: int = 0
+    seq: int = 0
+
+    @classmethod
+    def parse(cls, value: str) -> 'Cursor':
+        txid, _, seq = value.partition(':')
+        return cls(int(txid), int(seq or 0))
+
+    def __str__(self):
+        return f'{self.txid}:{self.seq}'
+
+
+@dataclass(frozen=True)
+class Change:
+    cursor: Cursor
+    film_work_id: UUID
+    source: str
+    operation: str
+    changed_at: datetime
+
+
+@dataclass
+class Batch:
+    changes: List[Change]
+    cursor: Cursor
+    film_ids: List[UUID] = field(default_factory=list)
+    deleted_ids: List[UUID] = field(default_factory=list)
+
+    def __post_init__(self):
+        last_operation = {}
+        for change in self.changes:
+            last_operation.pop(change.film_work_id, None)
+            last_operation[change.film_work_id] = change.operation
+        self.film_ids = [pk for pk, operation in last_operation.items() if operation != 'delete']
+        self.deleted_ids = [pk for pk, operation in last_operation.items() if operation == 'delete']
+
+
+def fetch_changes(cursor: Cursor, limit: int = 1000, using: str = 'default') -> Batch:
+    """Следующие не больше limit изменений после cursor.
+
+    film_ids - фильмы, которые надо переиндексировать, deleted_ids - удалённые;
+    каждый фильм встречается один раз, в порядке последнего изменения.
+    """
+
+    with connections[using].cursor() as db_cursor:
+        db_cursor.execute(FETCH_SQL, [str(cursor.txid), cursor.seq, limit])
+        changes = [
+            Change(Cursor(int(txid), seq), film_work_id, source, operation, changed_at)
+            for txid, seq, film_work_id, source, operation, changed_at in db_cursor.fetchall()
+        ]
+    return Batch(changes, changes[-1].cursor if changes else cursor)
+
+
+def iter_batches(cursor: Cursor, batch_size: int = 1000, using: str = 'default'):
+    """Пачки изменений после cursor, пока лента не дочитана до конца"""
+
+    while True:
+        batch = fetch_changes(cursor, batch_size, using)
+        if not batch.changes:
+            return
+        yield batch
+        cursor = batch.cursor
+
+
+def head_cursor(using: str = 'default') -> Cursor:
+    """Курсор, с которого читать после полной переиндексации.
+
+    Все изменения до него уже видны в таблицах; изменения ещё не завершённых
+    транзакций будут после него, так что ничего не потеряется, а часть
+    изменений может прийти повторно.
+    """
+
+    with connections[using].cursor() as db_cursor:
+        db_cursor.execute(HEAD_SQL)
+        return Cursor(int(db_cursor.fetchone()[0]), 0)
+
+
+def prune_changes(before: datetime, using: str = 'default') -> int:
+    with connections[using].cursor() as db_cursor:
+        db_cursor.execute(PRUNE_SQL, [before])
+        return db_cursor.rowcount
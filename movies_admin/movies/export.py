@@ -0,0 +1,135 @@
+import contextlib
+import csv
+import gzip
+import sys
+import uuid
+from pathlib import Path
+
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.fields import ArrayField
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Filmwork, FilmworkGenre, Genre, Person, PersonRole, RoleType
+
+EXPORT_FIELDS = {
+    'filmwork': (Filmwork, ('id', 'title', 'type', 'creation_date', 'rating', 'created_at', 'updated_at')),
+    'genre': (Genre, ('id', 'name', 'description', 'created_at', 'updated_at')),
+    'person': (Person, ('id', 'full_name', 'birth_date', 'created_at', 'updated_at')),
+}
+PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+
+
+def export_page(model_name, after, limit):
+    """Страница записей модели по возрастанию id после after и признак следующей страницы.
+
+    Страницы идут по первичному ключу, поэтому выгрузка всей таблицы не использует
+    OFFSET и каждая страница читается индексом за одно и то же время.
+    """
+
+    model, fields = EXPORT_FIELDS[model_name]
+    queryset = model.objects.order_by('id')
+    if after is not None:
+        queryset = queryset.filter(id__gt=after)
+    rows = list(queryset.values(*fields)[:limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+CATALOG_FIELDS = ('id', 'title', 'description', 'type', 'creation_date', 'rating', 'created_at', 'updated_at')
+CATALOG_LISTS = ('genre_names', *(f'{role}_names' for role in RoleType.values))
+CSV_LIST_SEPARATOR = '|'
+UUID_SPACE = 2 ** 128
+
+
+def names_subquery(links, name_field):
+    """Отсортированный массив имён по связям фильма: коррелированный подзапрос без GROUP BY по всей таблице"""
+
+    names = links.filter(filmwork=OuterRef('pk')).order_by().values('filmwork').annotate(
+        names=ArrayAgg(name_field, ordering=name_field)
+    ).values('names')
+    output_field = ArrayField(models.TextField())
+    return Coalesce(Subquery(names, output_field=output_field), Value([], output_field=output_field))
+
+
+def catalog_queryset():
+    """Фильмы с названиями жанров и именами персон по ролям в одном запросе.
+
+    Списки собираются коррелированными подзапросами по индексам связей, поэтому
+    запрос отдаёт строки по мере чтения и подходит для серверного курсора.
+    """
+
+    persons = {
+        f'{role}_names': names_subquery(PersonRole.objects.filter(role=role), 'person__full_name')
+        for role in RoleType.values
+    }
+    return Filmwork.objects.annotate(
+        genre_names=names_subquery(FilmworkGenre.objects, 'genre__name'),
+        **persons,
+    ).values(*CATALOG_FIELDS, *CATALOG_LISTS)
+
+
+def shard_bounds(shards):
+    """Границы id шардов: пространство UUID делится на равные части, для uuid4 это равные доли строк"""
+
+    edges = [uuid.UUID(int=UUID_SPACE * index // shards) for index in range(shards)]
+    return [(low, edges[index + 1] if index + 1 < shards else None) for index, low in enumerate(edges)]
+
+
+def shard_path(output, index, shards):
+    if shards == 1:
+        return output
+    path = Path(output)
+    suffixes = ''.join(path.suffixes)
+    stem = path.name[:len(path.name) - len(suffixes)] if suffixes else path.name
+    return str(path.with_name(f'{stem}-{index + 1:05d}-of-{shards:05d}{suffixes}'))
+
+
+def open_output(path):
+    if path == '-':
+        return contextlib.nullcontext(sys.stdout)
+    if path.endswith('.gz'):
+        return gzip.open(path, 'wt', encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='')
+
+
+def write_jsonl(rows, output):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    count = 0
+    for count, row in enumerate(rows, 1):
+        output.write(encoder.encode(row))
+        output.write('\n')
+    return count
+
+
+def write_csv(rows, output):
+    writer = csv.writer(output)
+    writer.writerow((*CATALOG_FIELDS, *CATALOG_LISTS))
+    count = 0
+    for count, row in enumerate(rows, 1):
+        writer.writerow((
+            *(row[name] for name in CATALOG_FIELDS),
+            *(CSV_LIST_SEPARATOR.join(row[name]) for name in CATALOG_LISTS),
+        ))
+    return count
+
+
+WRITERS = {'jsonl': write_jsonl, 'csv': write_csv}
+
+
+def export_shard(path, fmt, low, high, chunk_size):
+    """Выгружает фильмы с low <= id < high в файл path и возвращает число строк.
+
+    Строки читаются серверным курсором по chunk_size и сразу пишутся в файл,
+    поэтому память не зависит от размера каталога.
+    """
+
+    queryset = catalog_queryset().order_by('id')
+    if low is not None:
+        queryset = queryset.filter(id__gte=low)
+    if high is not None:
+        queryset = queryset.filter(id__lt=high)
+    with open_output(path) as output:
+        return WRITERS[fmt](queryset.iterator(chunk_size=chunk_size), output)
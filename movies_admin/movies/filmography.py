@@ -0,0 +1,88 @@
+import base64
+import json
+import uuid
+
+from django.db.models import Count
+
+from .models import FilmworkType, PersonRole, RoleType
+from .pagination import RowCompare
+
+PAGE_SIZE = 50
+ROLE_VAR = 'credits_role'
+AFTER_VAR = 'credits_after'
+KEYSET_FIELDS = ('filmwork__title', 'filmwork_id', 'role')
+
+
+def encode_cursor(row):
+    values = [row['filmwork__title'], str(row['filmwork_id']), row['role']]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(token):
+    """Значения (название, id фильма, роль) из курсора или None для некорректного курсора"""
+
+    try:
+        title, filmwork_id, role = json.loads(base64.urlsafe_b64decode(token.encode()))
+        return [str(title), uuid.UUID(filmwork_id), str(role)]
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def credit_counts(person_id):
+    """Число ролей персоны по видам; считается по индексу (person_id, role) без чтения фильмов"""
+
+    counts = dict(
+        PersonRole.objects.filter(person_id=person_id).order_by().values_list('role').annotate(count=Count('*'))
+    )
+    return {role: counts.get(role, 0) for role in RoleType.values}
+
+
+def credits_page(person_id, role=None, after=None, limit=PAGE_SIZE):
+    """Страница фильмов персоны по названию после курсора after и признак следующей страницы.
+
+    Роли персоны выбираются по индексу (person_id, role), к ним присоединяются
+    фильмы; следующая страница начинается с условия по строке (название, id, роль),
+    поэтому дальние страницы не требуют OFFSET.
+
+    Порядок по названию фильма не поддержан индексом: название лежит в film_work,
+    а отбор - по person_film_work. Поэтому каждая страница читает все роли персоны
+    (или все роли одного вида), присоединяет их фильмы и сортирует с LIMIT, то есть
+    стоит пропорционально числу ролей персоны, а не размеру страницы. Курсор лишь
+    отбрасывает уже показанные строки до сортировки.
+    """
+
+    queryset = PersonRole.objects.filter(person_id=person_id)
+    if role is not None:
+        queryset = queryset.filter(role=role)
+    if after is not None:
+        queryset = queryset.filter(RowCompare(KEYSET_FIELDS, after, '>'))
+    rows = list(queryset.order_by(*KEYSET_FIELDS).values(
+        'role', 'filmwork_id', 'filmwork__title', 'filmwork__type', 'filmwork__creation_date', 'filmwork__rating'
+    )[:limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def get_filmography(request, person_id):
+    """Контекст панели фильмографии для страницы персоны"""
+
+    role = request.GET.get(ROLE_VAR)
+    if role not in RoleType.values:
+        role = None
+    token = request.GET.get(AFTER_VAR)
+    after = decode_cursor(token) if token else None
+    rows, more = credits_page(person_id, role, after)
+    counts = credit_counts(person_id)
+    role_labels, type_labels = dict(RoleType.choices), dict(FilmworkType.choices)
+    for row in rows:
+        row['role_label'] = role_labels.get(row['role'], row['role'])
+        row['type_label'] = type_labels.get(row['filmwork__type'], row['filmwork__type'])
+    return {
+        'rows': rows,
+        'role': role,
+        'roles': [(value, label, counts[value]) for value, label in RoleType.choices],
+        'total': sum(counts.values()),
+        'is_first_page': after is None,
+        'next_cursor': encode_cursor(rows[-1]) if more else None,
+        'role_var': ROLE_VAR,
+        'after_var': AFTER_VAR,
+    }
@@ -0,0 +1,114 @@
+import csv
+import io
+import uuid
+
+from django import forms
+from django.db.models.functions import Lower
+
+from .models import Person, RoleType
+
+PERSON_NAME_MIN_LENGTH = 3
+DELIMITERS = ('\t', ';', ',')
+ROLE_ALIASES = {
+    **{value: value for value in RoleType.values},
+    **{str(label).lower(): value for value, label in RoleType.choices},
+    'актёр': RoleType.ACTOR,
+    'режиссер': RoleType.DIRECTOR,
+    'режиссёр': RoleType.DIRECTOR,
+}
+
+
+class CastImportForm(forms.Form):
+    """Импорт состава фильма из CSV-файла или вставленного текста.
+
+    Каждая строка: ФИО или id персоны и, через запятую, точку с запятой или
+    табуляцию, роль (actor, director, writer или русское название). Без роли
+    берётся default_role. Строка заголовка full_name,role пропускается.
+    """
+
+    csv_file = forms.FileField(label='CSV-файл', required=False)
+    text = forms.CharField(label='Или вставьте текст', required=False, widget=forms.Textarea(attrs={'rows': 15}))
+    default_role = forms.ChoiceField(label='Роль по умолчанию', choices=RoleType.choices, initial=RoleType.ACTOR)
+    replace = forms.BooleanField(label='Заменить текущий состав', required=False)
+    create_missing = forms.BooleanField(label='Создать отсутствующих персон', required=False)
+
+    def read_rows(self):
+        upload = self.cleaned_data.get('csv_file')
+        if upload:
+            try:
+                content = upload.read().decode('utf-8-sig')
+            except UnicodeDecodeError:
+                raise forms.ValidationError('Файл должен быть в кодировке UTF-8')
+        else:
+            content = self.cleaned_data.get('text', '')
+        if not content.strip():
+            raise forms.ValidationError('Загрузите файл или вставьте текст')
+        delimiter = next((delimiter for delimiter in DELIMITERS if delimiter in content), ',')
+        rows = csv.reader(io.StringIO(content), delimiter=delimiter)
+        return [row for row in rows if any(cell.strip() for cell in row)]
+
+    def parse_rows(self, rows):
+        entries, errors = [], []
+        for number, row in enumerate(rows, 1):
+            name = row[0].strip()
+            role = row[1].strip().lower() if len(row) > 1 and row[1].strip() else self.cleaned_data['default_role']
+            if number == 1 and name.lower() in ('full_name', 'фио', 'id'):
+                continue
+            if role not in ROLE_ALIASES:
+                errors.append(f'Строка {number}: неизвестная роль «{row[1].strip()}»')
+                continue
+            entries.append((name, ROLE_ALIASES[role]))
+        if errors:
+            raise forms.ValidationError(errors)
+        return entries
+
+    def resolve_persons(self, names):
+        """Ищет персон по id и по ФИО без учёта регистра одним запросом на каждый вид ключа"""
+
+        ids, lowered = {}, {}
+        for name in names:
+            try:
+                ids[name] = uuid.UUID(name)
+            except ValueError:
+                lowered[name] = name.lower()
+        found = {}
+        if ids:
+            existing = set(Person.objects.filter(pk__in=ids.values()).values_list('pk', flat=True))
+            found.update({name: pk for name, pk in ids.items() if pk in existing})
+        matches = {}
+        if lowered:
+            for pk, full_name in Person.objects.annotate(name_lower=Lower('full_name')).filter(
+                name_lower__in=set(lowered.values())
+            ).values_list('pk', 'full_name'):
+                matches.setdefault(full_name.lower(), []).append(pk)
+        errors, missing = [], []
+        for name, key in lowered.items():
+            pks = matches.get(key, [])
+            if len(pks) > 1:
+                errors.append(f'«{name}»: найдено несколько персон, укажите id')
+            elif pks:
+                found[name] = pks[0]
+            else:
+                missing.append(name)
+        missing_ids = [name for name in ids if name not in found]
+        if missing_ids:
+            errors.append(f'Не найдены персоны с id: {", ".join(missing_ids)}')
+        if missing and not self.cleaned_data.get('create_missing'):
+            errors.append(f'Не найдены персоны: {", ".join(missing)}')
+        short = [name for name in missing if len(name) < PERSON_NAME_MIN_LENGTH]
+        if short and self.cleaned_data.get('create_missing'):
+            errors.append(f'Слишком короткое ФИО для новой персоны: {", ".join(short)}')
+        if errors:
+            raise forms.ValidationError(errors)
+        return found, missing
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.errors:
+            return cleaned_data
+        entries = self.parse_rows(self.read_rows())
+        found, missing = self.resolve_persons(dict.fromkeys(name for name, _ in entries))
+        cleaned_data['entries'] = entries
+        cleaned_data['persons'] = found
+        cleaned_data['missing'] = missing
+        return cleaned_data
@@ -0,0 +1,22 @@
+from django.contrib.postgres.lookups import PostgresOperatorLookup
+from django.db.models import CharField, TextField
+from django.db.models.lookups import IContains
+
+
+class TrigramIContains(IContains):
+    """ILIKE '%term%' без UPPER(), чтобы условие использовало индекс gin_trgm_ops"""
+
+    lookup_name = 'trigram_icontains'
+
+    def get_rhs_op(self, connection, rhs):
+        return 'ILIKE %s' % rhs
+
+
+class TrigramWordSimilar(PostgresOperatorLookup):
+    lookup_name = 'trigram_word_similar'
+    postgres_operator = '%%>'
+
+
+for field_class in (CharField, TextField):
+    field_class.register_lookup(TrigramIContains)
+    field_class.register_lookup(TrigramWordSimilar)
@@ -0,0 +1,69 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from movies.export import WRITERS, export_shard, shard_bounds, shard_path
+
+
+class Command(BaseCommand):
+    help = 'Выгружает все фильмы с жанрами и персонами в JSON Lines или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='файл выгрузки, .gz - со сжатием, - для stdout')
+        parser.add_argument('--format', choices=WRITERS, default='jsonl')
+        parser.add_argument('--shards', type=int, default=1, help='разбить выгрузку на N файлов по диапазонам id')
+        parser.add_argument('--workers', type=int, default=1, help='сколько шардов выгружать параллельно')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='строк за одно чтение серверного курсора')
+
+    def handle(self, *args, **options):
+        output, shards, workers = options['output'], options['shards'], options['workers']
+        if shards < 1 or workers < 1:
+            raise CommandError('--shards и --workers должны быть положительными')
+        if output == '-' and shards > 1:
+            raise CommandError('Выгрузка в stdout возможна только одним шардом')
+        tasks = [
+            (shard_path(output, index, shards), options['format'], low, high, options['chunk_size'])
+            for index, (low, high) in enumerate(shard_bounds(shards))
+        ]
+
+        started = time.perf_counter()
+        if workers == 1:
+            total = sum(self.run_shard(*task) for task in tasks)
+        else:
+            total = self.run_parallel(tasks, workers)
+        self.stderr.write(f'Выгружено фильмов: {total} за {time.perf_counter() - started:.1f} с')
+
+    def run_shard(self, path, *args):
+        started = time.perf_counter()
+        rows = export_shard(path, *args)
+        self.log_shard(path, rows, time.perf_counter() - started)
+        return rows
+
+    def run_parallel(self, tasks, workers):
+        """Шарды выгружаются в отдельных процессах, каждый со своим соединением"""
+
+        connections.close_all()
+        total = 0
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup
+        ) as executor:
+            futures = {executor.submit(timed_export_shard, *task): task[0] for task in tasks}
+            for future in as_completed(futures):
+                rows, elapsed = future.result()
+                self.log_shard(futures[future], rows, elapsed)
+                total += rows
+        return total
+
+    def log_shard(self, path, rows, elapsed):
+        if path != '-':
+            self.stderr.write(f'{path}: {rows} строк за {elapsed:.1f} с')
+
+
+def timed_export_shard(*args):
+    started = time.perf_counter()
+    rows = export_shard(*args)
+    return rows, time.perf_counter() - started
@@ -0,0 +1,62 @@
+import json
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from movies.changes import Cursor, head_cursor, iter_batches, prune_changes
+
+
+class Command(BaseCommand):
+    help = 'Выводит изменения фильмов после курсора построчно в JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', default='0:0', help='курсор txid:seq, с которого читать')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--follow', action='store_true', help='ждать новые изменения')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='пауза между опросами с --follow, с')
+        parser.add_argument('--ids-only', action='store_true', help='по строке на пачку: id фильмов и удалённых')
+        parser.add_argument('--head', action='store_true', help='вывести текущий курсор и выйти')
+        parser.add_argument('--prune-days', type=int, help='удалить изменения старше N дней и выйти')
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if options['head']:
+            self.stdout.write(str(head_cursor(using)))
+            return
+        if options['prune_days'] is not None:
+            deleted = prune_changes(timezone.now() - timedelta(days=options['prune_days']), using)
+            self.stderr.write(f'Удалено изменений: {deleted}')
+            return
+        try:
+            cursor = Cursor.parse(options['since'])
+        except ValueError:
+            raise CommandError(f'Некорректный курсор: {options["since"]}')
+
+        while True:
+            for batch in iter_batches(cursor, options['batch_size'], using):
+                self.write_batch(batch, options['ids_only'])
+                cursor = batch.cursor
+            if not options['follow']:
+                break
+            time.sleep(options['poll_interval'])
+        self.stderr.write(f'Курсор: {cursor}')
+
+    def write_batch(self, batch, ids_only):
+        if ids_only:
+            self.stdout.write(json.dumps({
+                'cursor': str(batch.cursor),
+                'film_ids': [str(pk) for pk in batch.film_ids],
+                'deleted_ids': [str(pk) for pk in batch.deleted_ids],
+            }))
+            return
+        for change in batch.changes:
+            self.stdout.write(json.dumps({
+                'cursor': str(change.cursor),
+                'film_work_id': str(change.film_work_id),
+                'source': change.source,
+                'operation': change.operation,
+                'changed_at': change.changed_at.isoformat(),
+            }))
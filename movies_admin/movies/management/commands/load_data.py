@@ -0,0 +1,46 @@
+import argparse
+import importlib
+import os
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+def loader_module():
+    """Модуль sqlite_to_postgres/load_data.py; его соседние модули импортируются без пакета"""
+
+    if settings.SQLITE_TO_POSTGRES_DIR not in sys.path:
+        sys.path.insert(0, settings.SQLITE_TO_POSTGRES_DIR)
+    return importlib.import_module('load_data')
+
+
+class Command(BaseCommand):
+    help = 'Переносит данные из SQLite в Postgres, параметры те же, что у sqlite_to_postgres/load_data.py'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        loader_module().add_arguments(parser)
+        # пути по умолчанию - рядом со скриптом, а не в рабочем каталоге manage.py
+        parser.set_defaults(
+            sqlite=os.path.join(settings.SQLITE_TO_POSTGRES_DIR, 'db.sqlite'),
+            reject_file=os.path.join(settings.SQLITE_TO_POSTGRES_DIR, 'rejects.jsonl'),
+        )
+        parser.add_argument('--database', default='default', help='база Postgres из DATABASES')
+
+    def handle(self, *args, **options):
+        load_data = loader_module()
+        arguments = argparse.Namespace(**options)
+        load_data.check_arguments(self.create_parser('manage.py', 'load_data'), arguments)
+        database = connections[options['database']].settings_dict
+        dsl = {
+            'dbname': database['NAME'],
+            'user': database['USER'],
+            'password': database['PASSWORD'],
+            'host': database['HOST'],
+            'port': int(database['PORT'] or 5432),
+            'options': '-c search_path=content',
+        }
+        if not load_data.run(arguments, dsl):
+            raise CommandError('Загрузка не завершена, подробности в логе')
@@ -0,0 +1,67 @@
+import os
+import shlex
+
+from django.core.management.base import BaseCommand, CommandError
+
+from movies.startup import cold_start, group_by_package, profile_setup, summarize
+
+DEFAULT_PROFILES = ('config.settings.cli',)
+
+
+class Command(BaseCommand):
+    help = 'Время импорта модулей, заполнения реестра приложений и холодного старта команд по профилям настроек'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profile', action='append', dest='profiles',
+            help='модуль настроек для сравнения, можно несколько раз; по умолчанию текущий и config.settings.cli'
+        )
+        parser.add_argument('--top', type=int, default=15, help='сколько самых медленных пакетов и модулей выводить')
+        parser.add_argument(
+            '--command', dest='target', default='check',
+            help='команда manage.py для замера холодного старта, например "film_changes --head"'
+        )
+        parser.add_argument('--repeat', type=int, default=5, help='сколько раз запускать команду для замера')
+        parser.add_argument('--no-cold-start', action='store_true', help='не замерять запуск команды')
+
+    def handle(self, *args, **options):
+        profiles = options['profiles'] or [os.environ['DJANGO_SETTINGS_MODULE'], *DEFAULT_PROFILES]
+        profiles = list(dict.fromkeys(profiles))
+        for settings_module in profiles:
+            try:
+                report = profile_setup(settings_module)
+            except RuntimeError as error:
+                raise CommandError(f'{settings_module}: {error}')
+            self.write_report(report, options['top'])
+
+        if options['no_cold_start'] or options['repeat'] < 1:
+            return
+        target = shlex.split(options['target'])
+        self.stdout.write(f'\nХолодный старт: manage.py {options["target"]}, {options["repeat"]} запусков')
+        self.stdout.write(f'{"settings":<32} {"min, s":>8} {"median, s":>10} {"max, s":>8}')
+        for settings_module in profiles:
+            timings = summarize(cold_start(settings_module, target, options['repeat']))
+            self.stdout.write(
+                f'{settings_module:<32} {timings["min"]:>8.3f} {timings["median"]:>10.3f} {timings["max"]:>8.3f}'
+            )
+
+    def write_report(self, report, top):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{report["settings"]}'))
+        self.stdout.write(
+            f'import django {report["import_django"]:.3f} s, settings {report["load_settings"]:.3f} s, '
+            f'django.setup() {report["setup"]:.3f} s, total {report["total"]:.3f} s, modules {report["modules"]}'
+        )
+        self.stdout.write(f'\n{"app":<20} {"create, ms":>10} {"models, ms":>10} {"ready, ms":>10}')
+        for label, steps in report['apps'].items():
+            self.stdout.write(
+                f'{label:<20} {steps.get("create", 0) * 1000:>10.1f} {steps.get("models", 0) * 1000:>10.1f} '
+                f'{steps.get("ready", 0) * 1000:>10.1f}'
+            )
+        imports = report['imports']
+        self.stdout.write(f'\n{"package":<40} {"import, ms":>10}')
+        for package, seconds in group_by_package(imports).most_common(top):
+            self.stdout.write(f'{package:<40} {seconds * 1000:>10.1f}')
+        self.stdout.write(f'\n{"module":<56} {"self, ms":>10} {"cumulative, ms":>14}')
+        for item in sorted(imports, key=lambda item: item.self, reverse=True)[:top]:
+            self.stdout.write(f'{item.module:<56} {item.self * 1000:>10.1f} {item.cumulative * 1000:>14.1f}')
@@ -0,0 +1,172 @@
+import bisect
+import collections
+import contextvars
+import threading
+import time
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин и метками вида view"""
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            counts, total = self.series.get(labels, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self.series[labels] = (counts, total + value)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            series = {labels: (list(counts), total) for labels, (counts, total) in self.series.items()}
+        for labels, (counts, total) in sorted(series.items()):
+            label_text = render_labels(labels)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{render_labels((*labels, ("le", str(bound))))} {cumulative}')
+            lines.append(f'{self.name}_sum{label_text} {total}')
+            lines.append(f'{self.name}_count{label_text} {cumulative}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self.lock = threading.Lock()
+        self.series = collections.Counter()
+
+    def inc(self, labels, value=1):
+        with self.lock:
+            self.series[labels] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self.lock:
+            series = dict(self.series)
+        lines.extend(f'{self.name}{render_labels(labels)} {value}' for labels, value in sorted(series.items()))
+        return lines
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def render_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in labels) + '}'
+
+
+class QueryRecorder:
+    """Считает запросы, их время и повторы одного и того же SQL.
+
+    Django передаёт в execute_wrapper текст запроса с %s вместо значений, поэтому он
+    и служит сигнатурой: одинаковый шаблон, выполненный много раз за запрос, -
+    признак N+1.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.signatures = collections.Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.signatures[sql] += 1
+
+    def duplicates(self, threshold):
+        return [(sql, count) for sql, count in self.signatures.most_common() if count >= threshold]
+
+
+current_recorder = contextvars.ContextVar('current_recorder', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """execute_wrapper, который передаёт запрос QueryRecorder текущего запроса, если он есть.
+
+    Рекордер хранится в contextvar, а не ставится на соединение в middleware:
+    под ASGI view выполняется в другом потоке со своим соединением, а контекст
+    переходит туда вместе с вызовом sync_to_async.
+    """
+
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+REQUEST_LATENCY = Histogram(
+    'admin_request_duration_seconds', 'Время обработки запроса, с', LATENCY_BUCKETS
+)
+REQUEST_QUERIES = Histogram(
+    'admin_request_queries', 'Число SQL-запросов за запрос (только выборка)', QUERY_BUCKETS
+)
+REQUEST_DB_TIME = Histogram(
+    'admin_request_db_duration_seconds', 'Время в базе за запрос, с (только выборка)', LATENCY_BUCKETS
+)
+DUPLICATE_QUERIES = Counter(
+    'admin_duplicate_query_requests_total', 'Запросы, в которых один SQL повторился не меньше порога'
+)
+METRICS = (REQUEST_LATENCY, REQUEST_QUERIES, REQUEST_DB_TIME, DUPLICATE_QUERIES)
+
+
+POOL_METRICS = (
+    ('wait', 'Ожидание соединения из пула, с'),
+    ('hold', 'Время, на которое соединение брали из пула, с'),
+)
+
+
+def render_pool_stats(connections):
+    """Семейства пула по очереди: HELP и TYPE семейства, затем его строки по всем базам"""
+
+    stats = {}
+    for alias in connections:
+        get_pool_stats = getattr(connections[alias], 'get_pool_stats', None)
+        stats[alias] = get_pool_stats() if get_pool_stats is not None else {}
+    lines = []
+    for kind, description in POOL_METRICS:
+        name = f'admin_db_pool_{kind}_seconds'
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} summary')
+        for alias, alias_stats in stats.items():
+            if kind in alias_stats:
+                labels = render_labels((('alias', alias),))
+                lines.append(f'{name}_sum{labels} {alias_stats[kind]["total"]}')
+                lines.append(f'{name}_count{labels} {alias_stats[kind]["count"]}')
+    return lines
+
+
+def render(connections):
+    """Все метрики процесса в текстовом формате Prometheus"""
+
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    lines.extend(render_pool_stats(connections))
+    return '\n'.join(lines) + '\n'
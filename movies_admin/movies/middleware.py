@@ -0,0 +1,90 @@
+import asyncio
+import json
+import logging
+import random
+import time
+
+from django.conf import settings
+
+from .metrics import (
+    DUPLICATE_QUERIES, REQUEST_DB_TIME, REQUEST_LATENCY, REQUEST_QUERIES, QueryRecorder, current_recorder
+)
+
+log = logging.getLogger('movies.metrics')
+
+SQL_PREVIEW_LENGTH = 200
+
+
+class QueryMetricsMiddleware:
+    """Время ответа, число SQL-запросов, время в базе и повторы запросов по view.
+
+    Время ответа пишется в гистограмму для каждого запроса. Запросы к базе
+    считаются только для доли METRICS_SAMPLE_RATE запросов: для них же в лог
+    movies.metrics пишется JSON-строка. Если один и тот же SQL выполнился не
+    меньше METRICS_DUPLICATE_THRESHOLD раз, запись идёт с уровнем WARNING.
+    Гистограммы живут в памяти процесса, каждый воркер отдаёт свои. Работает и
+    под WSGI, и под ASGI, не переводя асинхронные view в синхронный режим.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.METRICS_SAMPLE_RATE
+        self.duplicate_threshold = settings.METRICS_DUPLICATE_THRESHOLD
+        if asyncio.iscoroutinefunction(self.get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        recorder, token, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        self.finish(request, response, recorder, started)
+        return response
+
+    async def __acall__(self, request):
+        recorder, token, started = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        self.finish(request, response, recorder, started)
+        return response
+
+    def start(self):
+        sampled = self.sample_rate >= 1 or random.random() < self.sample_rate
+        recorder = QueryRecorder() if sampled else None
+        return recorder, current_recorder.set(recorder), time.perf_counter()
+
+    def finish(self, request, response, recorder, started):
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        labels = (('view', match.view_name if match is not None else 'unmatched'),)
+        REQUEST_LATENCY.observe(labels, duration)
+        if recorder is not None:
+            self.report(request, response, labels, duration, recorder)
+
+    def report(self, request, response, labels, duration, recorder):
+        REQUEST_QUERIES.observe(labels, recorder.count)
+        REQUEST_DB_TIME.observe(labels, recorder.duration)
+        duplicates = recorder.duplicates(self.duplicate_threshold)
+        if duplicates:
+            DUPLICATE_QUERIES.inc(labels)
+        entry = {
+            'view': labels[0][1],
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration': round(duration, 6),
+            'queries': recorder.count,
+            'db_duration': round(recorder.duration, 6),
+            'duplicates': [
+                {'sql': sql[:SQL_PREVIEW_LENGTH], 'count': count} for sql, count in duplicates
+            ],
+        }
+        log.log(logging.WARNING if duplicates else logging.INFO, json.dumps(entry, ensure_ascii=False))
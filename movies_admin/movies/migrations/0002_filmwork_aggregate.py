@@ -0,0 +1,201 @@
+# Generated by Django 3.2 on 2026-10-18 16:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+FILM_WORK_AGGREGATE_SQL = '''
+CREATE TABLE IF NOT EXISTS content.film_work_aggregate (
+    film_work_id uuid PRIMARY KEY,
+    genres text NOT NULL DEFAULT '',
+    actors_count integer NOT NULL DEFAULT 0,
+    directors_count integer NOT NULL DEFAULT 0,
+    writers_count integer NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE VIEW content.film_work_aggregate_source AS
+SELECT fw.id AS film_work_id,
+       COALESCE(g.genres, '') AS genres,
+       p.actors_count,
+       p.directors_count,
+       p.writers_count
+FROM content.film_work fw
+LEFT JOIN LATERAL (
+    SELECT string_agg(genre.name, ', ' ORDER BY genre.name) AS genres
+    FROM content.genre_film_work gfw
+    JOIN content.genre genre ON genre.id = gfw.genre_id
+    WHERE gfw.film_work_id = fw.id
+) g ON true
+LEFT JOIN LATERAL (
+    SELECT count(*) FILTER (WHERE pfw.role = 'actor') AS actors_count,
+           count(*) FILTER (WHERE pfw.role = 'director') AS directors_count,
+           count(*) FILTER (WHERE pfw.role = 'writer') AS writers_count
+    FROM content.person_film_work pfw
+    WHERE pfw.film_work_id = fw.id
+) p ON true;
+
+CREATE OR REPLACE FUNCTION content.refresh_film_work_aggregate(film_ids uuid[]) RETURNS void AS $$
+    INSERT INTO content.film_work_aggregate (film_work_id, genres, actors_count, directors_count, writers_count)
+    SELECT film_work_id, genres, actors_count, directors_count, writers_count
+    FROM content.film_work_aggregate_source
+    WHERE film_work_id = ANY(film_ids)
+    ORDER BY film_work_id
+    ON CONFLICT (film_work_id) DO UPDATE SET
+        genres = EXCLUDED.genres,
+        actors_count = EXCLUDED.actors_count,
+        directors_count = EXCLUDED.directors_count,
+        writers_count = EXCLUDED.writers_count;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION content.film_work_aggregate_inserted() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('content.defer_aggregates', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    PERFORM content.refresh_film_work_aggregate(ARRAY(SELECT DISTINCT film_work_id FROM new_rows));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION content.film_work_aggregate_updated() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('content.defer_aggregates', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    PERFORM content.refresh_film_work_aggregate(ARRAY(
+        SELECT film_work_id FROM old_rows UNION SELECT film_work_id FROM new_rows
+    ));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION content.film_work_aggregate_deleted() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('content.defer_aggregates', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    PERFORM content.refresh_film_work_aggregate(ARRAY(SELECT DISTINCT film_work_id FROM old_rows));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION content.film_work_aggregate_film_inserted() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('content.defer_aggregates', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    PERFORM content.refresh_film_work_aggregate(ARRAY(SELECT id FROM new_rows));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION content.film_work_aggregate_film_deleted() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM content.film_work_aggregate WHERE film_work_id IN (SELECT id FROM old_rows);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION content.film_work_aggregate_genre_renamed() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('content.defer_aggregates', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    PERFORM content.refresh_film_work_aggregate(ARRAY(
+        SELECT DISTINCT gfw.film_work_id
+        FROM content.genre_film_work gfw
+        JOIN new_rows ON new_rows.id = gfw.genre_id
+    ));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS film_work_aggregate_inserted ON content.genre_film_work;
+CREATE TRIGGER film_work_aggregate_inserted AFTER INSERT ON content.genre_film_work
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_aggregate_inserted();
+DROP TRIGGER IF EXISTS film_work_aggregate_updated ON content.genre_film_work;
+CREATE TRIGGER film_work_aggregate_updated AFTER UPDATE ON content.genre_film_work
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_aggregate_updated();
+DROP TRIGGER IF EXISTS film_work_aggregate_deleted ON content.genre_film_work;
+CREATE TRIGGER film_work_aggregate_deleted AFTER DELETE ON content.genre_film_work
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_aggregate_deleted();
+
+DROP TRIGGER IF EXISTS film_work_aggregate_inserted ON content.person_film_work;
+CREATE TRIGGER film_work_aggregate_inserted AFTER INSERT ON content.person_film_work
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_aggregate_inserted();
+DROP TRIGGER IF EXISTS film_work_aggregate_updated ON content.person_film_work;
+CREATE TRIGGER film_work_aggregate_updated AFTER UPDATE ON content.person_film_work
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_aggregate_updated();
+DROP TRIGGER IF EXISTS film_work_aggregate_deleted ON content.person_film_work;
+CREATE TRIGGER film_work_aggregate_deleted AFTER DELETE ON content.person_film_work
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_aggregate_deleted();
+
+DROP TRIGGER IF EXISTS film_work_aggregate_inserted ON content.film_work;
+CREATE TRIGGER film_work_aggregate_inserted AFTER INSERT ON content.film_work
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_aggregate_film_inserted();
+DROP TRIGGER IF EXISTS film_work_aggregate_deleted ON content.film_work;
+CREATE TRIGGER film_work_aggregate_deleted AFTER DELETE ON content.film_work
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_aggregate_film_deleted();
+
+DROP TRIGGER IF EXISTS film_work_aggregate_genre_renamed ON content.genre;
+CREATE TRIGGER film_work_aggregate_genre_renamed AFTER UPDATE ON content.genre
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_aggregate_genre_renamed();
+
+SELECT content.refresh_film_work_aggregate(ARRAY(SELECT id FROM content.film_work));
+'''
+
+FILM_WORK_AGGREGATE_REVERSE_SQL = '''
+DROP TRIGGER IF EXISTS film_work_aggregate_inserted ON content.genre_film_work;
+DROP TRIGGER IF EXISTS film_work_aggregate_updated ON content.genre_film_work;
+DROP TRIGGER IF EXISTS film_work_aggregate_deleted ON content.genre_film_work;
+DROP TRIGGER IF EXISTS film_work_aggregate_inserted ON content.person_film_work;
+DROP TRIGGER IF EXISTS film_work_aggregate_updated ON content.person_film_work;
+DROP TRIGGER IF EXISTS film_work_aggregate_deleted ON content.person_film_work;
+DROP TRIGGER IF EXISTS film_work_aggregate_inserted ON content.film_work;
+DROP TRIGGER IF EXISTS film_work_aggregate_deleted ON content.film_work;
+DROP TRIGGER IF EXISTS film_work_aggregate_genre_renamed ON content.genre;
+DROP FUNCTION IF EXISTS content.film_work_aggregate_inserted();
+DROP FUNCTION IF EXISTS content.film_work_aggregate_updated();
+DROP FUNCTION IF EXISTS content.film_work_aggregate_deleted();
+DROP FUNCTION IF EXISTS content.film_work_aggregate_film_inserted();
+DROP FUNCTION IF EXISTS content.film_work_aggregate_film_deleted();
+DROP FUNCTION IF EXISTS content.film_work_aggregate_genre_renamed();
+DROP FUNCTION IF EXISTS content.refresh_film_work_aggregate(uuid[]);
+DROP VIEW IF EXISTS content.film_work_aggregate_source;
+DROP TABLE IF EXISTS content.film_work_aggregate;
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FilmworkAggregate',
+            fields=[
+                ('filmwork', models.OneToOneField(db_column='film_work_id', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='aggregate', serialize=False, to='movies.filmwork')),
+                ('genres', models.TextField(blank=True, verbose_name='Жанры')),
+                ('actors_count', models.IntegerField(default=0, verbose_name='Актёров')),
+                ('directors_count', models.IntegerField(default=0, verbose_name='Режиссёров')),
+                ('writers_count', models.IntegerField(default=0, verbose_name='Сценаристов')),
+            ],
+            options={
+                'verbose_name': 'Сводка по фильму',
+                'verbose_name_plural': 'Сводки по фильмам',
+                'db_table': '"content"."film_work_aggregate"',
+                'managed': False,
+            },
+        ),
+        migrations.RunSQL(FILM_WORK_AGGREGATE_SQL, FILM_WORK_AGGREGATE_REVERSE_SQL),
+    ]
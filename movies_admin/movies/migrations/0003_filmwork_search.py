@@ -0,0 +1,47 @@
+from django.db import migrations
+
+FILM_WORK_SEARCH_SQL = '''
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public;
+
+ALTER TABLE content.film_work ADD COLUMN IF NOT EXISTS search_vector tsvector;
+
+CREATE OR REPLACE FUNCTION content.film_work_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS film_work_search_vector ON content.film_work;
+CREATE TRIGGER film_work_search_vector BEFORE INSERT OR UPDATE OF title, description ON content.film_work
+    FOR EACH ROW EXECUTE FUNCTION content.film_work_search_vector();
+
+CREATE INDEX IF NOT EXISTS film_work_search_vector ON content.film_work USING gin (search_vector);
+
+CREATE INDEX IF NOT EXISTS film_work_title_trgm ON content.film_work USING gin (title public.gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS person_full_name_trgm ON content.person USING gin (full_name public.gin_trgm_ops);
+
+UPDATE content.film_work SET title = title WHERE search_vector IS NULL;
+'''
+
+FILM_WORK_SEARCH_REVERSE_SQL = '''
+DROP INDEX IF EXISTS content.person_full_name_trgm;
+DROP INDEX IF EXISTS content.film_work_title_trgm;
+DROP INDEX IF EXISTS content.film_work_search_vector;
+DROP TRIGGER IF EXISTS film_work_search_vector ON content.film_work;
+DROP FUNCTION IF EXISTS content.film_work_search_vector();
+ALTER TABLE content.film_work DROP COLUMN IF EXISTS search_vector;
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0002_filmwork_aggregate'),
+    ]
+
+    operations = [
+        migrations.RunSQL(FILM_WORK_SEARCH_SQL, FILM_WORK_SEARCH_REVERSE_SQL),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+KEYSET_INDEXES_SQL = '''
+CREATE INDEX IF NOT EXISTS film_work_title_id ON content.film_work (title, id);
+
+CREATE INDEX IF NOT EXISTS person_full_name_id ON content.person (full_name, id);
+
+CREATE INDEX IF NOT EXISTS genre_name_id ON content.genre (name, id);
+'''
+
+KEYSET_INDEXES_REVERSE_SQL = '''
+DROP INDEX IF EXISTS content.genre_name_id;
+DROP INDEX IF EXISTS content.person_full_name_id;
+DROP INDEX IF EXISTS content.film_work_title_id;
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0003_filmwork_search'),
+    ]
+
+    operations = [
+        migrations.RunSQL(KEYSET_INDEXES_SQL, KEYSET_INDEXES_REVERSE_SQL),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+AUTOCOMPLETE_INDEXES_SQL = '''
+CREATE INDEX IF NOT EXISTS person_full_name_prefix ON content.person (lower(full_name) text_pattern_ops);
+
+CREATE INDEX IF NOT EXISTS genre_name_prefix ON content.genre (lower(name) text_pattern_ops);
+
+CREATE INDEX IF NOT EXISTS genre_name_trgm ON content.genre USING gin (name public.gin_trgm_ops);
+'''
+
+AUTOCOMPLETE_INDEXES_REVERSE_SQL = '''
+DROP INDEX IF EXISTS content.genre_name_trgm;
+DROP INDEX IF EXISTS content.genre_name_prefix;
+DROP INDEX IF EXISTS content.person_full_name_prefix;
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0004_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(AUTOCOMPLETE_INDEXES_SQL, AUTOCOMPLETE_INDEXES_REVERSE_SQL),
+    ]
@@ -0,0 +1,149 @@
+from django.db import migrations
+
+FILM_WORK_CHANGE_SQL = '''
+CREATE TABLE IF NOT EXISTS content.film_work_change (
+    seq bigint GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    txid xid8 NOT NULL DEFAULT pg_current_xact_id(),
+    film_work_id uuid NOT NULL,
+    source text NOT NULL,
+    operation text NOT NULL,
+    changed_at timestamp with time zone NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS film_work_change_position ON content.film_work_change (txid, seq);
+
+CREATE OR REPLACE FUNCTION content.log_film_work_change(film_ids uuid[], source text, operation text) RETURNS void AS $$
+    INSERT INTO content.film_work_change (film_work_id, source, operation)
+    SELECT DISTINCT film_work_id, source, operation
+    FROM unnest(film_ids) AS film_work_id
+    ORDER BY film_work_id;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION content.film_work_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM content.log_film_work_change(ARRAY(SELECT id FROM old_rows), TG_TABLE_NAME, 'delete');
+    ELSE
+        PERFORM content.log_film_work_change(ARRAY(SELECT id FROM new_rows), TG_TABLE_NAME, lower(TG_OP));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION content.film_work_link_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM content.log_film_work_change(ARRAY(SELECT film_work_id FROM new_rows), TG_TABLE_NAME, 'update');
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM content.log_film_work_change(ARRAY(SELECT film_work_id FROM old_rows), TG_TABLE_NAME, 'update');
+    ELSE
+        PERFORM content.log_film_work_change(ARRAY(
+            SELECT film_work_id FROM old_rows UNION SELECT film_work_id FROM new_rows
+        ), TG_TABLE_NAME, 'update');
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION content.film_work_genre_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM content.log_film_work_change(ARRAY(
+        SELECT gfw.film_work_id
+        FROM content.genre_film_work gfw
+        JOIN new_rows ON new_rows.id = gfw.genre_id
+    ), TG_TABLE_NAME, 'update');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION content.film_work_person_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM content.log_film_work_change(ARRAY(
+        SELECT pfw.film_work_id
+        FROM content.person_film_work pfw
+        JOIN new_rows ON new_rows.id = pfw.person_id
+    ), TG_TABLE_NAME, 'update');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS film_work_change_inserted ON content.film_work;
+CREATE TRIGGER film_work_change_inserted AFTER INSERT ON content.film_work
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_changed();
+DROP TRIGGER IF EXISTS film_work_change_updated ON content.film_work;
+CREATE TRIGGER film_work_change_updated AFTER UPDATE ON content.film_work
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_changed();
+DROP TRIGGER IF EXISTS film_work_change_deleted ON content.film_work;
+CREATE TRIGGER film_work_change_deleted AFTER DELETE ON content.film_work
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_changed();
+
+DROP TRIGGER IF EXISTS film_work_change_inserted ON content.genre_film_work;
+CREATE TRIGGER film_work_change_inserted AFTER INSERT ON content.genre_film_work
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_link_changed();
+DROP TRIGGER IF EXISTS film_work_change_updated ON content.genre_film_work;
+CREATE TRIGGER film_work_change_updated AFTER UPDATE ON content.genre_film_work
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_link_changed();
+DROP TRIGGER IF EXISTS film_work_change_deleted ON content.genre_film_work;
+CREATE TRIGGER film_work_change_deleted AFTER DELETE ON content.genre_film_work
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_link_changed();
+
+DROP TRIGGER IF EXISTS film_work_change_inserted ON content.person_film_work;
+CREATE TRIGGER film_work_change_inserted AFTER INSERT ON content.person_film_work
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_link_changed();
+DROP TRIGGER IF EXISTS film_work_change_updated ON content.person_film_work;
+CREATE TRIGGER film_work_change_updated AFTER UPDATE ON content.person_film_work
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_link_changed();
+DROP TRIGGER IF EXISTS film_work_change_deleted ON content.person_film_work;
+CREATE TRIGGER film_work_change_deleted AFTER DELETE ON content.person_film_work
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_link_changed();
+
+DROP TRIGGER IF EXISTS film_work_change_updated ON content.genre;
+CREATE TRIGGER film_work_change_updated AFTER UPDATE ON content.genre
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_genre_changed();
+
+DROP TRIGGER IF EXISTS film_work_change_updated ON content.person;
+CREATE TRIGGER film_work_change_updated AFTER UPDATE ON content.person
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_person_changed();
+'''
+
+FILM_WORK_CHANGE_REVERSE_SQL = '''
+DROP TRIGGER IF EXISTS film_work_change_inserted ON content.film_work;
+DROP TRIGGER IF EXISTS film_work_change_updated ON content.film_work;
+DROP TRIGGER IF EXISTS film_work_change_deleted ON content.film_work;
+DROP TRIGGER IF EXISTS film_work_change_inserted ON content.genre_film_work;
+DROP TRIGGER IF EXISTS film_work_change_updated ON content.genre_film_work;
+DROP TRIGGER IF EXISTS film_work_change_deleted ON content.genre_film_work;
+DROP TRIGGER IF EXISTS film_work_change_inserted ON content.person_film_work;
+DROP TRIGGER IF EXISTS film_work_change_updated ON content.person_film_work;
+DROP TRIGGER IF EXISTS film_work_change_deleted ON content.person_film_work;
+DROP TRIGGER IF EXISTS film_work_change_updated ON content.genre;
+DROP TRIGGER IF EXISTS film_work_change_updated ON content.person;
+DROP FUNCTION IF EXISTS content.film_work_changed();
+DROP FUNCTION IF EXISTS content.film_work_link_changed();
+DROP FUNCTION IF EXISTS content.film_work_genre_changed();
+DROP FUNCTION IF EXISTS content.film_work_person_changed();
+DROP FUNCTION IF EXISTS content.log_film_work_change(uuid[], text, text);
+DROP TABLE IF EXISTS content.film_work_change;
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0005_autocomplete_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(FILM_WORK_CHANGE_SQL, FILM_WORK_CHANGE_REVERSE_SQL),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+REVERSE_LINK_INDEXES_SQL = '''
+CREATE INDEX IF NOT EXISTS person_film_work_person_role ON content.person_film_work (person_id, role, film_work_id);
+
+CREATE INDEX IF NOT EXISTS genre_film_work_genre ON content.genre_film_work (genre_id);
+'''
+
+REVERSE_LINK_INDEXES_REVERSE_SQL = '''
+DROP INDEX IF EXISTS content.genre_film_work_genre;
+DROP INDEX IF EXISTS content.person_film_work_person_role;
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0006_film_work_change'),
+    ]
+
+    operations = [
+        migrations.RunSQL(REVERSE_LINK_INDEXES_SQL, REVERSE_LINK_INDEXES_REVERSE_SQL),
+    ]
@@ -0,0 +1,55 @@
+from django.db import migrations
+
+LOCKED_REFRESH_SQL = '''
+-- Строки сводок сначала создаются и блокируются в порядке film_work_id, и только потом
+-- пересчитываются. Каждый запрос функции получает новый снимок, поэтому транзакция,
+-- дождавшаяся блокировки, пересчитывает сводку с учётом уже зафиксированных изменений
+-- другой транзакции, а не затирает их своим старым снимком.
+CREATE OR REPLACE FUNCTION content.refresh_film_work_aggregate(film_ids uuid[]) RETURNS void AS $$
+    INSERT INTO content.film_work_aggregate (film_work_id)
+    SELECT id FROM content.film_work WHERE id = ANY(film_ids) ORDER BY id
+    ON CONFLICT (film_work_id) DO NOTHING;
+
+    SELECT film_work_id FROM content.film_work_aggregate
+    WHERE film_work_id = ANY(film_ids)
+    ORDER BY film_work_id
+    FOR UPDATE;
+
+    INSERT INTO content.film_work_aggregate (film_work_id, genres, actors_count, directors_count, writers_count)
+    SELECT film_work_id, genres, actors_count, directors_count, writers_count
+    FROM content.film_work_aggregate_source
+    WHERE film_work_id = ANY(film_ids)
+    ORDER BY film_work_id
+    ON CONFLICT (film_work_id) DO UPDATE SET
+        genres = EXCLUDED.genres,
+        actors_count = EXCLUDED.actors_count,
+        directors_count = EXCLUDED.directors_count,
+        writers_count = EXCLUDED.writers_count;
+$$ LANGUAGE sql;
+'''
+
+UNLOCKED_REFRESH_SQL = '''
+CREATE OR REPLACE FUNCTION content.refresh_film_work_aggregate(film_ids uuid[]) RETURNS void AS $$
+    INSERT INTO content.film_work_aggregate (film_work_id, genres, actors_count, directors_count, writers_count)
+    SELECT film_work_id, genres, actors_count, directors_count, writers_count
+    FROM content.film_work_aggregate_source
+    WHERE film_work_id = ANY(film_ids)
+    ORDER BY film_work_id
+    ON CONFLICT (film_work_id) DO UPDATE SET
+        genres = EXCLUDED.genres,
+        actors_count = EXCLUDED.actors_count,
+        directors_count = EXCLUDED.directors_count,
+        writers_count = EXCLUDED.writers_count;
+$$ LANGUAGE sql;
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0007_reverse_link_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(LOCKED_REFRESH_SQL, UNLOCKED_REFRESH_SQL),
+    ]
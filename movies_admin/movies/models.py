@@ -1,5 +1,6 @@
 import uuid
 
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator, MinLengthValidator, MaxValueValidator
 from django.db import models
 from django.utils.translation import gettext_lazy as _
@@ -33,6 +34,9 @@ class Genre(TimeAndIDMixin, models.Model):
         verbose_name = _('Жанр')
         verbose_name_plural = _('Жанры')
         db_table = '"content"."genre"'
+        indexes = [
+            models.Index(fields=['name', 'id'], name='genre_name_id'),
+        ]
         managed = False
 
     def __str__(self):
@@ -48,6 +52,7 @@ class FilmworkGenre(models.Model):
     class Meta:
         indexes = [
             models.Index(fields=['filmwork_id', 'genre_id'], name='film_work_genre'),
+            models.Index(fields=['genre_id'], name='genre_film_work_genre'),
         ]
         verbose_name = _('Жанр фильма')
         verbose_name_plural = _('Жанры фильмов')
@@ -66,6 +71,9 @@ class Person(TimeAndIDMixin, models.Model):
         verbose_name = _('Персона')
         verbose_name_plural = _('Персоны')
         db_table = '"content"."person"'
+        indexes = [
+            models.Index(fields=['full_name', 'id'], name='person_full_name_id'),
+        ]
         managed = False
 
     def __str__(self):
@@ -93,6 +101,7 @@ class PersonRole(models.Model):
         db_table = '"content"."person_film_work"'
         indexes = [
             models.Index(fields=['filmwork_id', 'person_id', 'role'], name='film_work_person_role'),
+            models.Index(fields=['person_id', 'role', 'filmwork_id'], name='person_film_work_person_role'),
         ]
         managed = False
 
@@ -113,12 +122,36 @@ class Filmwork(TimeAndIDMixin, models.Model):
     )
     type = models.CharField(_('Тип произведения'), max_length=20, choices=FilmworkType.choices)
     genres = models.ManyToManyField(Genre, through='FilmworkGenre')
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         verbose_name = _('Фильм')
         verbose_name_plural = _('Фильмы')
         db_table = '"content"."film_work"'
+        indexes = [
+            models.Index(fields=['title', 'id'], name='film_work_title_id'),
+        ]
         managed = False
 
     def __str__(self):
         return self.title
+
+
+class FilmworkAggregate(models.Model):
+    filmwork = models.OneToOneField(
+        'Filmwork', primary_key=True, on_delete=models.DO_NOTHING, related_name='aggregate',
+        db_column='film_work_id'
+    )
+    genres = models.TextField(_('Жанры'), blank=True)
+    actors_count = models.IntegerField(_('Актёров'), default=0)
+    directors_count = models.IntegerField(_('Режиссёров'), default=0)
+    writers_count = models.IntegerField(_('Сценаристов'), default=0)
+
+    class Meta:
+        verbose_name = _('Сводка по фильму')
+        verbose_name_plural = _('Сводки по фильмам')
+        db_table = '"content"."film_work_aggregate"'
+        managed = False
+
+    def __str__(self):
+        return str(self.filmwork_id)
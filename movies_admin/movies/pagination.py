@@ -0,0 +1,250 @@
+import base64
+import json
+
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import InvalidPage, Paginator
+from django.db import connections
+from django.db.models import BooleanField, Expression, F, Value
+from django.utils.functional import cached_property
+
+from .caching import read_through
+
+AFTER_VAR = 'after'
+BEFORE_VAR = 'before'
+LAST_PAGE = 'last'
+ESTIMATE_COUNT_FROM = 10000
+
+
+class RowCompare(Expression):
+    """Сравнение строк (a, id) > (x, y), которое Postgres выполняет проходом по индексу (a, id)"""
+
+    conditional = True
+    output_field = BooleanField()
+
+    def __init__(self, fields, values, operator):
+        super().__init__()
+        self.lhs = [F(name) for name in fields]
+        self.rhs = [Value(value) for value in values]
+        self.operator = operator
+
+    def get_source_expressions(self):
+        return [*self.lhs, *self.rhs]
+
+    def set_source_expressions(self, exprs):
+        self.lhs, self.rhs = exprs[:len(self.lhs)], exprs[len(self.lhs):]
+
+    def as_sql(self, compiler, connection):
+        sides, params = [], []
+        for expressions in (self.lhs, self.rhs):
+            parts = []
+            for expression in expressions:
+                sql, expression_params = compiler.compile(expression)
+                parts.append(sql)
+                params.extend(expression_params)
+            sides.append(', '.join(parts))
+        return f'({sides[0]}) {self.operator} ({sides[1]})', params
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator, который для больших таблиц берёт число строк из статистики Postgres.
+
+    Без фильтров используется pg_class.reltuples, с фильтрами - оценка планировщика
+    из EXPLAIN. Точный COUNT(*) выполняется, только если в таблице меньше
+    ESTIMATE_COUNT_FROM строк или статистики ещё нет (reltuples = -1). Результат
+    кешируется по тексту запроса.
+    """
+
+    estimated = False
+
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        try:
+            sql = str(query)
+        except EmptyResultSet:
+            return 0
+        self.estimated, count = read_through(
+            'count', [query.model._meta.model_name], (self.object_list.db, sql), self.estimate_count
+        )
+        return count
+
+    def estimate_count(self):
+        """Пара (число оценено, число строк)"""
+
+        query = self.object_list.query
+        connection = connections[self.object_list.db]
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', (query.model._meta.db_table,))
+            table_rows = cursor.fetchone()[0]
+            if table_rows < ESTIMATE_COUNT_FROM:
+                return False, self.object_list.count()
+            if not query.where:
+                return True, int(table_rows)
+            sql, params = query.get_compiler(connection=connection).as_sql()
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            return True, cursor.fetchone()[0][0]['Plan']['Plan Rows']
+
+    def validate_number(self, number):
+        if not self.estimated:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise InvalidPage('Номер страницы должен быть целым числом')
+        if number < 1:
+            raise InvalidPage('Номер страницы меньше 1')
+        return number
+
+    def page(self, number):
+        """Страница без обрезки по оценке числа строк, которая может быть меньше настоящего"""
+
+        if not self.estimated:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(self.object_list[bottom:bottom + self.per_page], number, self)
+
+
+class KeysetChangeList(ChangeList):
+    """Список объектов с постраничным выводом по ключу (keyset_field, id).
+
+    Вместо OFFSET следующая страница выбирается условием (keyset_field, id) > (x, y)
+    от последней строки текущей, поэтому любая страница стоит как первая. Режим
+    включается, когда список отсортирован по keyset_field в любую сторону, при
+    другой сортировке работает обычная пагинация.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.keyset_params = {
+            name: request.GET[name] for name in (AFTER_VAR, BEFORE_VAR) if name in request.GET
+        }
+        self.keyset_descending = None
+        self.keyset = None
+        super().__init__(request, *args, **kwargs)
+
+    @property
+    def keyset_field(self):
+        return self.model_admin.get_keyset_field()
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        for name in (AFTER_VAR, BEFORE_VAR):
+            lookup_params.pop(name, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        return super().get_query_string(new_params, [*(remove or []), AFTER_VAR, BEFORE_VAR])
+
+    def get_ordering(self, request, queryset):
+        ordering = super().get_ordering(request, queryset)
+        fields = []
+        for part in ordering:
+            if not isinstance(part, str):
+                return ordering
+            name = part.lstrip('-')
+            if name not in (field for field, _ in fields):
+                fields.append((name, part.startswith('-')))
+        key = fields[0] if fields else None
+        if key is None or key[0] != self.keyset_field or any(name not in ('pk', 'id') for name, _ in fields[1:]):
+            return ordering
+        self.keyset_descending = key[1]
+        prefix = '-' if self.keyset_descending else ''
+        return [prefix + self.keyset_field, prefix + 'id']
+
+    def encode_cursor(self, obj):
+        values = [str(getattr(obj, self.keyset_field)), str(obj.pk)]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, token):
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(token.encode()))
+            return (
+                self.lookup_opts.get_field(self.keyset_field).to_python(value),
+                self.lookup_opts.pk.to_python(pk),
+            )
+        except Exception as e:
+            raise IncorrectLookupParameters(e)
+
+    def capped_count(self):
+        """Точное число строк, но не больше max(list_max_show_all, list_per_page) + 1.
+
+        Этого хватает для флагов can_show_all и multi_page: по оценке числа строк
+        список, в котором на самом деле много строк, мог бы выводиться целиком.
+        """
+
+        return self.queryset[:max(self.list_max_show_all, self.list_per_page) + 1].count()
+
+    def get_results(self, request):
+        if self.keyset_descending is None or self.show_all:
+            super().get_results(request)
+            if getattr(self.paginator, 'estimated', False):
+                count = self.capped_count()
+                self.can_show_all = count <= self.list_max_show_all
+                self.multi_page = count > self.list_per_page
+                if (self.show_all and self.can_show_all) or not self.multi_page:
+                    self.result_list = self.queryset._clone()
+                else:
+                    try:
+                        self.result_list = self.paginator.page(self.page_num).object_list
+                    except InvalidPage:
+                        raise IncorrectLookupParameters
+            return
+
+        paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        after, before = self.keyset_params.get(AFTER_VAR), self.keyset_params.get(BEFORE_VAR)
+        queryset = self.queryset
+        forward = '<' if self.keyset_descending else '>'
+        backward = '>' if self.keyset_descending else '<'
+        if after:
+            queryset = queryset.filter(RowCompare((self.keyset_field, 'id'), self.decode_cursor(after), forward))
+        elif before:
+            if before != LAST_PAGE:
+                queryset = queryset.filter(
+                    RowCompare((self.keyset_field, 'id'), self.decode_cursor(before), backward)
+                )
+            queryset = queryset.reverse()
+        result_list = list(queryset[:self.list_per_page + 1])
+        has_more = len(result_list) > self.list_per_page
+        result_list = result_list[:self.list_per_page]
+        if before:
+            result_list.reverse()
+            has_previous, has_next = has_more, before != LAST_PAGE
+        else:
+            has_previous, has_next = bool(after), has_more
+        has_previous, has_next = has_previous and bool(result_list), has_next and bool(result_list)
+        self.keyset = {
+            'first_url': has_previous and self.get_query_string(),
+            'previous_url': has_previous and self.get_query_string({BEFORE_VAR: self.encode_cursor(result_list[0])}),
+            'next_url': has_next and self.get_query_string({AFTER_VAR: self.encode_cursor(result_list[-1])}),
+            'last_url': has_next and self.get_query_string({BEFORE_VAR: LAST_PAGE}),
+        }
+
+        self.result_count = paginator.count
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = result_list
+        count = self.capped_count() if paginator.estimated else self.result_count
+        self.can_show_all = count <= self.list_max_show_all
+        self.multi_page = has_previous or has_next
+        self.paginator = paginator
+
+
+class KeysetPaginationMixin:
+    """Пагинация по ключу и оценка числа строк для ModelAdmin.
+
+    Ключом служит keyset_field или первое поле ordering. Под (keyset_field, id)
+    нужен составной индекс.
+    """
+
+    keyset_field = None
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_keyset_field(self):
+        return self.keyset_field or self.ordering[0].lstrip('-')
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
@@ -0,0 +1,60 @@
+import re
+import uuid
+from datetime import date
+
+from django.contrib.postgres.search import SearchQuery
+from django.db.models import Q
+
+from . import lookups  # noqa: F401
+
+SEARCH_CONFIG = 'simple'
+WORD_RE = re.compile(r'\w+')
+
+
+def prefix_tsquery(term):
+    """Запрос to_tsquery, где каждое слово ищется по префиксу: 'star wa' -> 'star:* & wa:*'"""
+
+    words = WORD_RE.findall(term)
+    if not words:
+        return None
+    return SearchQuery(' & '.join(f'{word}:*' for word in words), search_type='raw', config=SEARCH_CONFIG)
+
+
+class IndexedSearchMixin:
+    """Поиск в админке по индексам Postgres вместо ILIKE по всем search_fields.
+
+    UUID ищется сразу по первичному ключу, дата - по полям из search_date_fields.
+    Остальные запросы идут в tsvector-колонку search_vector_field (GIN) и в
+    поля search_trigram_fields через ILIKE и нечёткое совпадение pg_trgm.
+    """
+
+    search_vector_field = None
+    search_trigram_fields = ()
+    search_date_fields = ()
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        try:
+            return queryset.filter(pk=uuid.UUID(term)), False
+        except ValueError:
+            pass
+
+        query = Q()
+        if self.search_date_fields:
+            try:
+                day = date.fromisoformat(term)
+            except ValueError:
+                pass
+            else:
+                for field in self.search_date_fields:
+                    query |= Q(**{field: day})
+        tsquery = prefix_tsquery(term)
+        if self.search_vector_field and tsquery is not None:
+            query |= Q(**{self.search_vector_field: tsquery})
+        for field in self.search_trigram_fields:
+            query |= Q(**{f'{field}__trigram_icontains': term}) | Q(**{f'{field}__trigram_word_similar': term})
+        if not query:
+            return queryset.none(), False
+        return queryset.filter(query), False
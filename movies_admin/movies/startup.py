@@ -0,0 +1,139 @@
+"""Замеры запуска Django в отдельных процессах.
+
+Запуск этого модуля (python -X importtime -m movies.startup) выполняет
+django.setup() с таймерами на каждом шаге заполнения реестра приложений и
+выводит их в stdout в JSON, а время импорта модулей интерпретатор пишет в
+stderr. Функции ниже запускают такие процессы с нужными настройками и
+разбирают результат, поэтому измеряется холодный старт, а не уже
+импортированный процесс команды.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter, namedtuple
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+ImportTime = namedtuple('ImportTime', 'module self cumulative')
+
+
+def child_environ(settings_module: str) -> dict:
+    environ = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module)
+    environ.pop('PYTHONPROFILEIMPORTTIME', None)
+    return environ
+
+
+def parse_importtime(output: str) -> list:
+    """Строки -X importtime: время модуля без вложенных импортов и вместе с ними, в секундах"""
+
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        imports.append(ImportTime(name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6))
+    return imports
+
+
+def package_of(module: str) -> str:
+    """Пакет для группировки: django.contrib.admin, django.db, movies, psycopg2"""
+
+    parts = module.split('.')
+    if parts[:2] == ['django', 'contrib']:
+        return '.'.join(parts[:3])
+    if parts[0] == 'django':
+        return '.'.join(parts[:2])
+    return parts[0]
+
+
+def group_by_package(imports: list) -> Counter:
+    packages = Counter()
+    for item in imports:
+        packages[package_of(item.module)] += item.self
+    return packages
+
+
+def profile_setup(settings_module: str) -> dict:
+    """Импорт модулей и django.setup() в новом процессе с настройками settings_module"""
+
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-m', 'movies.startup'],
+        cwd=PROJECT_DIR, env=child_environ(settings_module), capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'setup failed')
+    report = json.loads(result.stdout.splitlines()[-1])
+    report['imports'] = parse_importtime(result.stderr)
+    return report
+
+
+def cold_start(settings_module: str, command: list, repeat: int) -> list:
+    """Время полного запуска python manage.py command в новых процессах, в секундах"""
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, 'manage.py', *command], cwd=PROJECT_DIR, env=child_environ(settings_module),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True,
+        )
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def summarize(timings: list) -> dict:
+    return {'min': min(timings), 'median': statistics.median(timings), 'max': max(timings)}
+
+
+def timed_setup() -> dict:
+    """django.setup() с замером создания конфигурации, импорта моделей и ready() каждого приложения"""
+
+    started = time.perf_counter()
+    import django
+    from django.apps.config import AppConfig
+    from django.conf import settings
+
+    steps = {}
+    create = AppConfig.create.__func__
+
+    def timed(label, step, function):
+        def wrapper():
+            step_started = time.perf_counter()
+            try:
+                return function()
+            finally:
+                steps[label][step] = time.perf_counter() - step_started
+        return wrapper
+
+    def timed_create(cls, entry):
+        step_started = time.perf_counter()
+        app_config = create(cls, entry)
+        steps[app_config.label] = {'create': time.perf_counter() - step_started}
+        app_config.import_models = timed(app_config.label, 'models', app_config.import_models)
+        app_config.ready = timed(app_config.label, 'ready', app_config.ready)
+        return app_config
+
+    AppConfig.create = classmethod(timed_create)
+    settings_started = time.perf_counter()
+    settings.INSTALLED_APPS
+    settings_loaded = time.perf_counter()
+    django.setup()
+    finished = time.perf_counter()
+    return {
+        'settings': os.environ['DJANGO_SETTINGS_MODULE'],
+        'import_django': settings_started - started,
+        'load_settings': settings_loaded - settings_started,
+        'setup': finished - settings_loaded,
+        'total': finished - started,
+        'apps': steps,
+        'modules': len(sys.modules),
+    }
+
+
+if __name__ == '__main__':
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.dev')
+    print(json.dumps(timed_setup()))
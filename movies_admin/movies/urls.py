@@ -0,0 +1,13 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'movies'
+
+urlpatterns = [
+    path('autocomplete/<str:model_name>/', views.autocomplete, name='autocomplete'),
+    path('export/<str:model_name>/', views.export, name='export'),
+    path('cache-stats/', views.cache_stats, name='cache_stats'),
+    path('pool-stats/', views.pool_stats, name='pool_stats'),
+    path('metrics/', views.metrics, name='metrics'),
+]
@@ -0,0 +1,146 @@
+import functools
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import condition, require_safe
+
+from . import api
+from .autocomplete import AUTOCOMPLETE_FIELDS, cached_search
+from .caching import get_stats
+from .export import EXPORT_FIELDS, MAX_PAGE_SIZE, PAGE_SIZE, export_page
+from .metrics import render
+
+
+@sync_to_async
+def has_staff_access(request, permission):
+    """Проверка доступа в потоке: request.user и has_perm читают сессию и базу"""
+
+    user = request.user
+    return user.is_active and user.is_staff and user.has_perm(permission)
+
+
+def has_token(request, token):
+    authorization = request.headers.get('Authorization', '')
+    return bool(token) and constant_time_compare(authorization, f'Bearer {token}')
+
+
+def get_int(request, name, default):
+    try:
+        return max(int(request.GET.get(name, default)), 1)
+    except ValueError:
+        return default
+
+
+async def autocomplete(request, model_name):
+    """Подсказки для виджетов autocomplete в формате select2: только id и подпись"""
+
+    if model_name not in AUTOCOMPLETE_FIELDS:
+        raise Http404
+    if not await has_staff_access(request, f'movies.view_{model_name}'):
+        return JsonResponse({'error': 'Нет доступа'}, status=403)
+    results, more = await sync_to_async(cached_search)(
+        model_name, request.GET.get('term', '').strip(), get_int(request, 'page', 1)
+    )
+    return JsonResponse({
+        'results': [{'id': pk, 'text': text} for pk, text in results],
+        'pagination': {'more': more},
+    })
+
+
+async def export(request, model_name):
+    """Выгрузка записей модели в JSON страницами по id: следующая страница - ?after=<next>"""
+
+    if model_name not in EXPORT_FIELDS:
+        raise Http404
+    if not await has_staff_access(request, f'movies.view_{model_name}'):
+        return JsonResponse({'error': 'Нет доступа'}, status=403)
+    after = request.GET.get('after')
+    if after is not None:
+        try:
+            after = uuid.UUID(after)
+        except ValueError:
+            return JsonResponse({'error': 'Некорректный after'}, status=400)
+    limit = min(get_int(request, 'limit', PAGE_SIZE), MAX_PAGE_SIZE)
+    rows, more = await sync_to_async(export_page)(model_name, after, limit)
+    return JsonResponse({'results': rows, 'next': str(rows[-1]['id']) if more else None})
+
+
+def cache_stats(request):
+    """Попадания и промахи кеша админки по видам записей"""
+
+    if not (request.user.is_active and request.user.is_staff):
+        return JsonResponse({'error': 'Нет доступа'}, status=403)
+    return JsonResponse(get_stats())
+
+
+def pool_stats(request):
+    """Статистика пулов соединений текущего процесса для бэкенда config.db_pool"""
+
+    if not (request.user.is_active and request.user.is_staff):
+        return JsonResponse({'error': 'Нет доступа'}, status=403)
+    stats = {}
+    for alias in connections:
+        pool = getattr(connections[alias], 'get_pool_stats', None)
+        if pool is not None:
+            stats[alias] = pool()
+    return JsonResponse(stats)
+
+
+def metrics(request):
+    """Метрики процесса в формате Prometheus для сотрудника или по токену METRICS_TOKEN"""
+
+    if not (has_token(request, settings.METRICS_TOKEN) or request.user.is_active and request.user.is_staff):
+        return HttpResponse('Нет доступа', status=403, content_type='text/plain; charset=utf-8')
+    return HttpResponse(render(connections), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def api_view(view):
+    """Доступ к API: по токену API_TOKEN или сессии сотрудника; без API_TOKEN API открыто"""
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = settings.API_TOKEN
+        if token and not (has_token(request, token) or request.user.is_active and request.user.is_staff):
+            return JsonResponse({'error': 'Нет доступа'}, status=403)
+        return view(request, *args, **kwargs)
+    return require_safe(wrapper)
+
+
+def get_page_params(request):
+    after = request.GET.get('after')
+    return uuid.UUID(after) if after is not None else None, min(
+        get_int(request, 'limit', api.PAGE_SIZE), api.MAX_PAGE_SIZE
+    )
+
+
+def films_etag(request):
+    try:
+        return api.page_etag(*get_page_params(request))
+    except ValueError:
+        return None
+
+
+@api_view
+@condition(etag_func=films_etag)
+def films(request):
+    """Фильмы с жанрами и персонами по ролям, страницами по id: следующая - ?after=<next>"""
+
+    try:
+        after, limit = get_page_params(request)
+    except ValueError:
+        return JsonResponse({'error': 'Некорректный after'}, status=400)
+    results, more = api.films_page(after, limit)
+    return JsonResponse({'results': results, 'next': str(results[-1]['id']) if more else None})
+
+
+@api_view
+@condition(etag_func=lambda request, pk: api.detail_etag(pk))
+def film(request, pk):
+    result = api.film_detail(pk)
+    if result is None:
+        raise Http404
+    return JsonResponse(result)
@@ -49,3 +49,335 @@ CREATE TABLE IF NOT EXISTS content.person_film_work (
 CREATE UNIQUE INDEX IF NOT EXISTS film_work_genre ON genre_film_work (film_work_id, genre_id);
 
 CREATE UNIQUE INDEX IF NOT EXISTS film_work_person_role ON person_film_work (film_work_id, person_id, role);
+
+CREATE TABLE IF NOT EXISTS content.sync_state (
+    table_name text PRIMARY KEY,
+    mark text NOT NULL,
+    last_id text NOT NULL,
+    synced_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS content.load_checkpoint (
+    table_name text PRIMARY KEY,
+    last_rowid bigint NOT NULL,
+    saved_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS content.deferred_index (
+    index_name text PRIMARY KEY,
+    table_name text NOT NULL,
+    is_constraint boolean NOT NULL,
+    restore_sql text NOT NULL,
+    deferred_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS content.film_work_aggregate (
+    film_work_id uuid PRIMARY KEY,
+    genres text NOT NULL DEFAULT '',
+    actors_count integer NOT NULL DEFAULT 0,
+    directors_count integer NOT NULL DEFAULT 0,
+    writers_count integer NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE VIEW content.film_work_aggregate_source AS
+SELECT fw.id AS film_work_id,
+       COALESCE(g.genres, '') AS genres,
+       p.actors_count,
+       p.directors_count,
+       p.writers_count
+FROM content.film_work fw
+LEFT JOIN LATERAL (
+    SELECT string_agg(genre.name, ', ' ORDER BY genre.name) AS genres
+    FROM content.genre_film_work gfw
+    JOIN content.genre genre ON genre.id = gfw.genre_id
+    WHERE gfw.film_work_id = fw.id
+) g ON true
+LEFT JOIN LATERAL (
+    SELECT count(*) FILTER (WHERE pfw.role = 'actor') AS actors_count,
+           count(*) FILTER (WHERE pfw.role = 'director') AS directors_count,
+           count(*) FILTER (WHERE pfw.role = 'writer') AS writers_count
+    FROM content.person_film_work pfw
+    WHERE pfw.film_work_id = fw.id
+) p ON true;
+
+-- Строки сводок сначала создаются и блокируются в порядке film_work_id, и только потом
+-- пересчитываются. Каждый запрос функции получает новый снимок, поэтому транзакция,
+-- дождавшаяся блокировки, пересчитывает сводку с учётом уже зафиксированных изменений
+-- другой транзакции, а не затирает их своим старым снимком.
+CREATE OR REPLACE FUNCTION content.refresh_film_work_aggregate(film_ids uuid[]) RETURNS void AS $$
+    INSERT INTO content.film_work_aggregate (film_work_id)
+    SELECT id FROM content.film_work WHERE id = ANY(film_ids) ORDER BY id
+    ON CONFLICT (film_work_id) DO NOTHING;
+
+    SELECT film_work_id FROM content.film_work_aggregate
+    WHERE film_work_id = ANY(film_ids)
+    ORDER BY film_work_id
+    FOR UPDATE;
+
+    INSERT INTO content.film_work_aggregate (film_work_id, genres, actors_count, directors_count, writers_count)
+    SELECT film_work_id, genres, actors_count, directors_count, writers_count
+    FROM content.film_work_aggregate_source
+    WHERE film_work_id = ANY(film_ids)
+    ORDER BY film_work_id
+    ON CONFLICT (film_work_id) DO UPDATE SET
+        genres = EXCLUDED.genres,
+        actors_count = EXCLUDED.actors_count,
+        directors_count = EXCLUDED.directors_count,
+        writers_count = EXCLUDED.writers_count;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION content.film_work_aggregate_inserted() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('content.defer_aggregates', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    PERFORM content.refresh_film_work_aggregate(ARRAY(SELECT DISTINCT film_work_id FROM new_rows));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION content.film_work_aggregate_updated() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('content.defer_aggregates', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    PERFORM content.refresh_film_work_aggregate(ARRAY(
+        SELECT film_work_id FROM old_rows UNION SELECT film_work_id FROM new_rows
+    ));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION content.film_work_aggregate_deleted() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('content.defer_aggregates', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    PERFORM content.refresh_film_work_aggregate(ARRAY(SELECT DISTINCT film_work_id FROM old_rows));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION content.film_work_aggregate_film_inserted() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('content.defer_aggregates', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    PERFORM content.refresh_film_work_aggregate(ARRAY(SELECT id FROM new_rows));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION content.film_work_aggregate_film_deleted() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM content.film_work_aggregate WHERE film_work_id IN (SELECT id FROM old_rows);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION content.film_work_aggregate_genre_renamed() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('content.defer_aggregates', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    PERFORM content.refresh_film_work_aggregate(ARRAY(
+        SELECT DISTINCT gfw.film_work_id
+        FROM content.genre_film_work gfw
+        JOIN new_rows ON new_rows.id = gfw.genre_id
+    ));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS film_work_aggregate_inserted ON content.genre_film_work;
+CREATE TRIGGER film_work_aggregate_inserted AFTER INSERT ON content.genre_film_work
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_aggregate_inserted();
+DROP TRIGGER IF EXISTS film_work_aggregate_updated ON content.genre_film_work;
+CREATE TRIGGER film_work_aggregate_updated AFTER UPDATE ON content.genre_film_work
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_aggregate_updated();
+DROP TRIGGER IF EXISTS film_work_aggregate_deleted ON content.genre_film_work;
+CREATE TRIGGER film_work_aggregate_deleted AFTER DELETE ON content.genre_film_work
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_aggregate_deleted();
+
+DROP TRIGGER IF EXISTS film_work_aggregate_inserted ON content.person_film_work;
+CREATE TRIGGER film_work_aggregate_inserted AFTER INSERT ON content.person_film_work
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_aggregate_inserted();
+DROP TRIGGER IF EXISTS film_work_aggregate_updated ON content.person_film_work;
+CREATE TRIGGER film_work_aggregate_updated AFTER UPDATE ON content.person_film_work
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_aggregate_updated();
+DROP TRIGGER IF EXISTS film_work_aggregate_deleted ON content.person_film_work;
+CREATE TRIGGER film_work_aggregate_deleted AFTER DELETE ON content.person_film_work
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_aggregate_deleted();
+
+DROP TRIGGER IF EXISTS film_work_aggregate_inserted ON content.film_work;
+CREATE TRIGGER film_work_aggregate_inserted AFTER INSERT ON content.film_work
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_aggregate_film_inserted();
+DROP TRIGGER IF EXISTS film_work_aggregate_deleted ON content.film_work;
+CREATE TRIGGER film_work_aggregate_deleted AFTER DELETE ON content.film_work
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_aggregate_film_deleted();
+
+DROP TRIGGER IF EXISTS film_work_aggregate_genre_renamed ON content.genre;
+CREATE TRIGGER film_work_aggregate_genre_renamed AFTER UPDATE ON content.genre
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_aggregate_genre_renamed();
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public;
+
+ALTER TABLE content.film_work ADD COLUMN IF NOT EXISTS search_vector tsvector;
+
+CREATE OR REPLACE FUNCTION content.film_work_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS film_work_search_vector ON content.film_work;
+CREATE TRIGGER film_work_search_vector BEFORE INSERT OR UPDATE OF title, description ON content.film_work
+    FOR EACH ROW EXECUTE FUNCTION content.film_work_search_vector();
+
+CREATE INDEX IF NOT EXISTS film_work_search_vector ON content.film_work USING gin (search_vector);
+
+CREATE INDEX IF NOT EXISTS film_work_title_trgm ON content.film_work USING gin (title public.gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS person_full_name_trgm ON content.person USING gin (full_name public.gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS film_work_title_id ON content.film_work (title, id);
+
+CREATE INDEX IF NOT EXISTS person_full_name_id ON content.person (full_name, id);
+
+CREATE INDEX IF NOT EXISTS genre_name_id ON content.genre (name, id);
+
+CREATE INDEX IF NOT EXISTS person_full_name_prefix ON content.person (lower(full_name) text_pattern_ops);
+
+CREATE INDEX IF NOT EXISTS genre_name_prefix ON content.genre (lower(name) text_pattern_ops);
+
+CREATE INDEX IF NOT EXISTS genre_name_trgm ON content.genre USING gin (name public.gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS person_film_work_person_role ON content.person_film_work (person_id, role, film_work_id);
+
+CREATE INDEX IF NOT EXISTS genre_film_work_genre ON content.genre_film_work (genre_id);
+
+CREATE TABLE IF NOT EXISTS content.film_work_change (
+    seq bigint GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    txid xid8 NOT NULL DEFAULT pg_current_xact_id(),
+    film_work_id uuid NOT NULL,
+    source text NOT NULL,
+    operation text NOT NULL,
+    changed_at timestamp with time zone NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS film_work_change_position ON content.film_work_change (txid, seq);
+
+CREATE OR REPLACE FUNCTION content.log_film_work_change(film_ids uuid[], source text, operation text) RETURNS void AS $$
+    INSERT INTO content.film_work_change (film_work_id, source, operation)
+    SELECT DISTINCT film_work_id, source, operation
+    FROM unnest(film_ids) AS film_work_id
+    ORDER BY film_work_id;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION content.film_work_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM content.log_film_work_change(ARRAY(SELECT id FROM old_rows), TG_TABLE_NAME, 'delete');
+    ELSE
+        PERFORM content.log_film_work_change(ARRAY(SELECT id FROM new_rows), TG_TABLE_NAME, lower(TG_OP));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION content.film_work_link_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM content.log_film_work_change(ARRAY(SELECT film_work_id FROM new_rows), TG_TABLE_NAME, 'update');
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM content.log_film_work_change(ARRAY(SELECT film_work_id FROM old_rows), TG_TABLE_NAME, 'update');
+    ELSE
+        PERFORM content.log_film_work_change(ARRAY(
+            SELECT film_work_id FROM old_rows UNION SELECT film_work_id FROM new_rows
+        ), TG_TABLE_NAME, 'update');
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION content.film_work_genre_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM content.log_film_work_change(ARRAY(
+        SELECT gfw.film_work_id
+        FROM content.genre_film_work gfw
+        JOIN new_rows ON new_rows.id = gfw.genre_id
+    ), TG_TABLE_NAME, 'update');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION content.film_work_person_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM content.log_film_work_change(ARRAY(
+        SELECT pfw.film_work_id
+        FROM content.person_film_work pfw
+        JOIN new_rows ON new_rows.id = pfw.person_id
+    ), TG_TABLE_NAME, 'update');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS film_work_change_inserted ON content.film_work;
+CREATE TRIGGER film_work_change_inserted AFTER INSERT ON content.film_work
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_changed();
+DROP TRIGGER IF EXISTS film_work_change_updated ON content.film_work;
+CREATE TRIGGER film_work_change_updated AFTER UPDATE ON content.film_work
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_changed();
+DROP TRIGGER IF EXISTS film_work_change_deleted ON content.film_work;
+CREATE TRIGGER film_work_change_deleted AFTER DELETE ON content.film_work
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_changed();
+
+DROP TRIGGER IF EXISTS film_work_change_inserted ON content.genre_film_work;
+CREATE TRIGGER film_work_change_inserted AFTER INSERT ON content.genre_film_work
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_link_changed();
+DROP TRIGGER IF EXISTS film_work_change_updated ON content.genre_film_work;
+CREATE TRIGGER film_work_change_updated AFTER UPDATE ON content.genre_film_work
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_link_changed();
+DROP TRIGGER IF EXISTS film_work_change_deleted ON content.genre_film_work;
+CREATE TRIGGER film_work_change_deleted AFTER DELETE ON content.genre_film_work
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_link_changed();
+
+DROP TRIGGER IF EXISTS film_work_change_inserted ON content.person_film_work;
+CREATE TRIGGER film_work_change_inserted AFTER INSERT ON content.person_film_work
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_link_changed();
+DROP TRIGGER IF EXISTS film_work_change_updated ON content.person_film_work;
+CREATE TRIGGER film_work_change_updated AFTER UPDATE ON content.person_film_work
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_link_changed();
+DROP TRIGGER IF EXISTS film_work_change_deleted ON content.person_film_work;
+CREATE TRIGGER film_work_change_deleted AFTER DELETE ON content.person_film_work
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_link_changed();
+
+DROP TRIGGER IF EXISTS film_work_change_updated ON content.genre;
+CREATE TRIGGER film_work_change_updated AFTER UPDATE ON content.genre
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_genre_changed();
+
+DROP TRIGGER IF EXISTS film_work_change_updated ON content.person;
+CREATE TRIGGER film_work_change_updated AFTER UPDATE ON content.person
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.film_work_person_changed();
@@ -0,0 +1,52 @@
+"""Сравнение текстового и бинарного COPY на db.sqlite.
+
+Каждый прогон очищает таблицы в Postgres и переносит все таблицы потоковым COPY.
+Запуск из папки sqlite_to_postgres: python bench_copy_format.py --repeat 5
+"""
+import argparse
+import sqlite3
+import time
+from contextlib import closing
+
+import psycopg2
+
+from load_data import COPY_FORMATS, TABLES_TO_CLASSES, PostgresSaver, SQLiteLoader, get_dsl
+
+
+def run_once(sqlite_conn, pg_conn, copy_format: str) -> tuple:
+    rows = sent = 0
+    started = time.perf_counter()
+    with pg_conn.cursor() as cursor:
+        cursor.execute(f'TRUNCATE {", ".join(TABLES_TO_CLASSES)}')
+    for table_name, data_class in TABLES_TO_CLASSES.items():
+        sqlite_loader = SQLiteLoader(sqlite_conn, table_name, data_class)
+        postgres_saver = PostgresSaver(pg_conn, table_name, data_class)
+        stream = postgres_saver.save_stream(sqlite_loader.cursor, copy_format)
+        rows += stream.rows
+        sent += stream.sent
+    pg_conn.commit()
+    return rows, sent, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Сравнение форматов COPY')
+    parser.add_argument('--sqlite', default='db.sqlite')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with closing(sqlite3.connect(args.sqlite)) as sqlite_conn, closing(psycopg2.connect(**get_dsl())) as pg_conn:
+        print(f'{"format":<8} {"rows":>8} {"MB sent":>8} {"best, s":>8} {"mean, s":>8} {"rows/s":>10}')
+        for copy_format in COPY_FORMATS:
+            timings = []
+            for _ in range(args.repeat):
+                rows, sent, elapsed = run_once(sqlite_conn, pg_conn, copy_format)
+                timings.append(elapsed)
+            best = min(timings)
+            print(
+                f'{copy_format:<8} {rows:>8} {sent / 2 ** 20:>8.2f} {best:>8.3f} '
+                f'{sum(timings) / len(timings):>8.3f} {rows / best:>10.0f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
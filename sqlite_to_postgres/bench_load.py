@@ -0,0 +1,168 @@
+"""Бенчмарк переноса SQLite -> Postgres с раздельными замерами этапов.
+
+Для каждого размера блока отдельно замеряются чтение из SQLite с созданием dataclass,
+преобразование в строки COPY и сам COPY, а также пиковый RSS процесса. Каждый размер
+блока прогоняется в отдельном процессе, чтобы пиковый RSS не накапливался.
+
+По умолчанию поднимается временный экземпляр Postgres (initdb и pg_ctl из --pg-bin
+или PATH, запуск не от root), который удаляется после прогона. С --use-env-db
+используется база из .env, таблицы в ней очищаются.
+
+python generate_data.py --films 1000000 -o big.sqlite
+python bench_load.py --sqlite big.sqlite --block-sizes 100,1000,10000
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import resource
+import shutil
+import socket
+import sqlite3
+import subprocess
+import tempfile
+import time
+from contextlib import closing
+from pathlib import Path
+
+import psycopg2
+
+from data_classes import SERIALIZERS
+from load_data import DEFER_AGGREGATES_SQL, TABLES_TO_CLASSES, SQLiteLoader, get_dsl
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / 'schema_design' / 'db-schema.sql'
+
+
+class ThrowawayPostgres:
+    """Временный кластер Postgres в каталоге tempfile, удаляется при выходе"""
+
+    def __init__(self, pg_bin=None):
+        self.pg_bin = pg_bin
+        self.directory = None
+        self.port = None
+
+    def binary(self, name: str) -> str:
+        if self.pg_bin:
+            return os.path.join(self.pg_bin, name)
+        path = shutil.which(name)
+        if path is None:
+            raise RuntimeError(f'{name} не найден, укажите --pg-bin')
+        return path
+
+    def __enter__(self):
+        self.directory = tempfile.mkdtemp(prefix='bench_pg_')
+        with closing(socket.socket()) as sock:
+            sock.bind(('127.0.0.1', 0))
+            self.port = sock.getsockname()[1]
+        data = os.path.join(self.directory, 'data')
+        subprocess.run(
+            [self.binary('initdb'), '-D', data, '-U', 'bench', '-E', 'UTF8', '--auth=trust'],
+            check=True, stdout=subprocess.DEVNULL
+        )
+        subprocess.run(
+            [
+                self.binary('pg_ctl'), '-D', data, '-w', '-l', os.path.join(self.directory, 'postgres.log'),
+                '-o', f"-p {self.port} -k {self.directory} -c listen_addresses='' -c fsync=off", 'start',
+            ],
+            check=True, stdout=subprocess.DEVNULL
+        )
+        with closing(psycopg2.connect(**self.dsl(dbname='postgres'))) as conn:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute('CREATE DATABASE movies')
+        with closing(psycopg2.connect(**self.dsl())) as conn, conn.cursor() as cursor:
+            cursor.execute(SCHEMA_PATH.read_text())
+            conn.commit()
+        return self
+
+    def dsl(self, dbname='movies') -> dict:
+        return {
+            'dbname': dbname,
+            'user': 'bench',
+            'host': self.directory,
+            'port': self.port,
+            'options': '-c search_path=content',
+        }
+
+    def __exit__(self, *exc_info):
+        subprocess.run(
+            [self.binary('pg_ctl'), '-D', os.path.join(self.directory, 'data'), '-m', 'immediate', 'stop'],
+            stdout=subprocess.DEVNULL
+        )
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def copy_table_staged(sqlite_conn, cursor, table_name: str, block_size: int, stats: dict):
+    data_class = TABLES_TO_CLASSES[table_name]
+    serializer = SERIALIZERS[data_class]
+    sqlite_loader = SQLiteLoader(sqlite_conn, table_name, data_class)
+    while True:
+        started = time.perf_counter()
+        block = [data_class(*row) for row in sqlite_loader.cursor.fetchmany(block_size)]
+        read_done = time.perf_counter()
+        if not block:
+            break
+        block_values = serializer.format_objects(block)
+        transform_done = time.perf_counter()
+        with io.StringIO(block_values) as f:
+            cursor.copy_from(f, table=table_name, columns=data_class.__slots__, size=block_size)
+        copy_done = time.perf_counter()
+        stats['rows'] += len(block)
+        stats['read'] += read_done - started
+        stats['transform'] += transform_done - read_done
+        stats['copy'] += copy_done - transform_done
+
+
+def run_block_size(sqlite_path: str, dsl: dict, block_size: int) -> dict:
+    """Прогон всех таблиц с заданным размером блока, время этапов суммируется по таблицам"""
+
+    stats = {'rows': 0, 'read': 0.0, 'transform': 0.0, 'copy': 0.0}
+    with closing(sqlite3.connect(sqlite_path)) as sqlite_conn, closing(psycopg2.connect(**dsl)) as pg_conn:
+        with pg_conn.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {", ".join(TABLES_TO_CLASSES)}')
+            # как и load_data.py, COPY идёт без пересчёта сводок в триггерах
+            cursor.execute(DEFER_AGGREGATES_SQL)
+            for table_name in TABLES_TO_CLASSES:
+                copy_table_staged(sqlite_conn, cursor, table_name, block_size, stats)
+        pg_conn.commit()
+    stats['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return stats
+
+
+def run_isolated(sqlite_path: str, dsl: dict, block_size: int) -> dict:
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(run_block_size, (sqlite_path, dsl, block_size))
+
+
+def report(sqlite_path: str, dsl: dict, block_sizes: list):
+    print(
+        f'{"block":>7} {"rows":>10} {"read, s":>8} {"transform, s":>12} {"copy, s":>8} '
+        f'{"total, s":>8} {"rows/s":>10} {"peak RSS, MB":>12}'
+    )
+    for block_size in block_sizes:
+        stats = run_isolated(sqlite_path, dsl, block_size)
+        total = stats['read'] + stats['transform'] + stats['copy']
+        print(
+            f'{block_size:>7} {stats["rows"]:>10} {stats["read"]:>8.2f} {stats["transform"]:>12.2f} '
+            f'{stats["copy"]:>8.2f} {total:>8.2f} {stats["rows"] / total:>10.0f} {stats["peak_rss_mb"]:>12.1f}'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк переноса SQLite -> Postgres')
+    parser.add_argument('--sqlite', default='db.sqlite')
+    parser.add_argument('--block-sizes', default='100,1000,10000', help='размеры блоков через запятую')
+    parser.add_argument('--pg-bin', help='каталог с initdb и pg_ctl')
+    parser.add_argument('--use-env-db', action='store_true', help='использовать базу из .env вместо временной')
+    args = parser.parse_args()
+    block_sizes = [int(size) for size in args.block_sizes.split(',')]
+
+    if args.use_env_db:
+        report(args.sqlite, get_dsl(), block_sizes)
+        return
+    with ThrowawayPostgres(args.pg_bin) as postgres:
+        report(args.sqlite, postgres.dsl(), block_sizes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Микробенчмарк преобразования строк SQLite в текстовый формат COPY.
+
+Для каждой таблицы строки один раз читаются в память, затем каждый способ
+преобразования прогоняется --repeat раз и выводится лучший результат в строках
+в секунду:
+
+- asdict - прежний get_values через dataclasses.asdict и str() каждого поля;
+- generic - format_text_row с проверкой типа каждого значения;
+- row - собранный по __slots__ сериализатор кортежей (поток COPY);
+- object - он же для объектов dataclass (COPY блоками).
+
+Запуск из папки sqlite_to_postgres: python bench_serializers.py --sqlite db.sqlite --repeat 5
+"""
+import argparse
+import sqlite3
+import time
+from contextlib import closing
+from dataclasses import asdict
+
+from copy_stream import format_text_row
+from data_classes import SERIALIZERS
+from load_data import TABLES_TO_CLASSES
+
+METHODS = ('asdict', 'generic', 'row', 'object')
+
+
+def asdict_values(objects) -> str:
+    return '\n'.join(['\t'.join([str(x) for x in asdict(obj).values()]) for obj in objects])
+
+
+def best_time(function, data, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(data)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def bench_table(sqlite_conn, table_name: str, repeat: int) -> tuple:
+    data_class = TABLES_TO_CLASSES[table_name]
+    serializer = SERIALIZERS[data_class]
+    rows = sqlite_conn.execute(f'SELECT {", ".join(data_class.__slots__)} FROM {table_name}').fetchall()
+    objects = [data_class(*row) for row in rows]
+    runs = {
+        'asdict': (asdict_values, objects),
+        'generic': (lambda data: ''.join([format_text_row(row) for row in data]), rows),
+        'row': (serializer.format_rows, rows),
+        'object': (serializer.format_objects, objects),
+    }
+    return len(rows), {method: best_time(function, data, repeat) for method, (function, data) in runs.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Скорость преобразования строк в формат COPY')
+    parser.add_argument('--sqlite', default='db.sqlite')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f'{"table":<18} {"rows":>8} ' + ' '.join([f'{method + ", rows/s":>16}' for method in METHODS]))
+    with closing(sqlite3.connect(args.sqlite)) as sqlite_conn:
+        for table_name in TABLES_TO_CLASSES:
+            count, timings = bench_table(sqlite_conn, table_name, args.repeat)
+            speeds = ' '.join([f'{count / timings[method] if timings[method] else 0:>16.0f}' for method in METHODS])
+            print(f'{table_name:<18} {count:>8} {speeds}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+import struct
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+from copy_stream import STREAM_BLOCK_SIZE, CopyStream
+from data_classes import Movie, Person, Genre, GenreFilmWork, PersonFilmWork
+
+BINARY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+BINARY_TRAILER = struct.pack('!h', -1)
+BINARY_NULL = struct.pack('!i', -1)
+
+PG_EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)
+PG_EPOCH_DATE = date(2000, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+COLUMN_TYPES = {
+    Movie: (
+        'uuid', 'text', 'text', 'date', 'text', 'text', 'float8', 'text', 'timestamptz', 'timestamptz'
+    ),
+    Genre: ('uuid', 'text', 'text', 'timestamptz', 'timestamptz'),
+    Person: ('uuid', 'text', 'date', 'timestamptz', 'timestamptz'),
+    GenreFilmWork: ('uuid', 'uuid', 'uuid', 'timestamptz'),
+    PersonFilmWork: ('uuid', 'uuid', 'uuid', 'text', 'timestamptz'),
+}
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Время из SQLite вида '2021-06-16 20:14:09.221838+00'"""
+
+    if len(value) > 3 and value[-3] in '+-':
+        value += ':00'
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+def encode_uuid(value: str) -> bytes:
+    return uuid.UUID(value).bytes
+
+
+def encode_text(value: str) -> bytes:
+    return str(value).encode()
+
+
+def encode_date(value: str) -> bytes:
+    return struct.pack('!i', (date.fromisoformat(value[:10]) - PG_EPOCH_DATE).days)
+
+
+def encode_timestamptz(value: str) -> bytes:
+    return struct.pack('!q', (parse_timestamp(value) - PG_EPOCH) // MICROSECOND)
+
+
+def encode_float8(value: float) -> bytes:
+    return struct.pack('!d', float(value))
+
+
+ENCODERS = {
+    'uuid': encode_uuid,
+    'text': encode_text,
+    'date': encode_date,
+    'timestamptz': encode_timestamptz,
+    'float8': encode_float8,
+}
+
+
+class BinaryCopyStream(CopyStream):
+    """Адаптер над курсором SQLite, отдающий данные в бинарном формате COPY.
+
+    Значения упаковываются сразу в представление Postgres, поэтому сервер не разбирает
+    их из текста, а NULL передаётся длиной -1 и не путается со строкой 'None'.
+    """
+
+    def __init__(self, cursor, data_class, block_size=STREAM_BLOCK_SIZE):
+        super().__init__(cursor, block_size)
+        self.encoders = [ENCODERS[column_type] for column_type in COLUMN_TYPES[data_class]]
+        self.field_count = struct.pack('!h', len(self.encoders))
+        self.buffer += BINARY_HEADER
+
+    def encode_rows(self, rows: list) -> bytes:
+        chunks = []
+        for row in rows:
+            chunks.append(self.field_count)
+            for encode, value in zip(self.encoders, row):
+                if value is None:
+                    chunks.append(BINARY_NULL)
+                    continue
+                data = encode(value)
+                chunks.append(struct.pack('!i', len(data)))
+                chunks.append(data)
+        return b''.join(chunks)
+
+    def fill(self):
+        super().fill()
+        if self.exhausted:
+            self.buffer += BINARY_TRAILER
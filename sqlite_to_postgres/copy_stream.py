@@ -0,0 +1,64 @@
+STREAM_BLOCK_SIZE = 1000
+COPY_BUFFER_SIZE = 64 * 1024
+
+TEXT_NULL = '\\N'
+TEXT_ESCAPES = str.maketrans({
+    '\\': '\\\\',
+    '\t': '\\t',
+    '\n': '\\n',
+    '\r': '\\r',
+})
+
+
+def format_text_value(value) -> str:
+    """Значение поля в текстовом формате COPY"""
+
+    if value is None:
+        return TEXT_NULL
+    if isinstance(value, str):
+        return value.translate(TEXT_ESCAPES)
+    return str(value)
+
+
+def format_text_row(row: tuple) -> str:
+    return '\t'.join([format_text_value(value) for value in row]) + '\n'
+
+
+class CopyStream:
+    """Файлоподобный адаптер над курсором SQLite для copy_expert.
+
+    Строки читаются из курсора пачками по мере того, как Postgres запрашивает данные,
+    поэтому вся таблица уходит одним COPY без промежуточных объектов и строк на блок.
+    """
+
+    def __init__(self, cursor, block_size=STREAM_BLOCK_SIZE, format_rows=None):
+        self.cursor = cursor
+        self.format_rows = format_rows
+        self.block_size = block_size
+        self.buffer = bytearray()
+        self.rows = 0
+        self.sent = 0
+        self.exhausted = False
+
+    def encode_rows(self, rows: list) -> bytes:
+        if self.format_rows is not None:
+            return self.format_rows(rows).encode()
+        return ''.join([format_text_row(row) for row in rows]).encode()
+
+    def fill(self):
+        rows = self.cursor.fetchmany(self.block_size)
+        if not rows:
+            self.exhausted = True
+            return
+        self.buffer += self.encode_rows(rows)
+        self.rows += len(rows)
+
+    def read(self, size=-1) -> bytes:
+        while not self.exhausted and (size < 0 or len(self.buffer) < size):
+            self.fill()
+        if size < 0:
+            size = len(self.buffer)
+        chunk = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        self.sent += len(chunk)
+        return chunk
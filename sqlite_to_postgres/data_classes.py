@@ -1,4 +1,6 @@
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
+
+from copy_stream import TEXT_ESCAPES, TEXT_NULL
 
 
 @dataclass
@@ -6,7 +8,9 @@ class CommonTable:
 
     @property
     def get_values(self):
-        return '\t'.join([str(x) for x in asdict(self).values()])
+        """Строка COPY без перевода строки в конце"""
+
+        return SERIALIZERS[type(self)].format_object(self)[:-1]
 
 
 @dataclass
@@ -72,3 +76,49 @@ class PersonFilmWork(CommonTable):
     person_id: str
     role: str
     created_at: str
+
+
+class Serializer:
+    """Преобразование строк таблицы в текстовый формат COPY.
+
+    Функции собираются один раз по __slots__ класса: значения берутся из кортежа
+    или атрибутов объекта без промежуточного словаря, None становится \\N, а
+    строковые поля экранируются. Остальные поля (rating) передаются через str().
+    """
+
+    def __init__(self, data_class):
+        self.data_class = data_class
+        self.source = self.generate_source(data_class)
+        namespace = {'N': TEXT_NULL, 'E': TEXT_ESCAPES}
+        exec(compile(self.source, f'<serializer {data_class.__name__}>', 'exec'), namespace)
+        self.format_row = namespace['format_row']
+        self.format_object = namespace['format_object']
+
+    @staticmethod
+    def generate_source(data_class) -> str:
+        columns = data_class.__slots__
+        names = [f'v{i}' for i in range(len(columns))]
+        fields = []
+        for name, column in zip(names, columns):
+            if data_class.__annotations__[column] is str:
+                fields.append(f'{{(N if {name} is None else {name}.translate(E))}}')
+            else:
+                fields.append(f'{{(N if {name} is None else str({name}))}}')
+        line = "f'" + '\\t'.join(fields) + "\\n'"
+        unpack = ', '.join(names) + ','
+        attributes = ', '.join([f'obj.{column}' for column in columns]) + ','
+        return (
+            f'def format_row(row):\n    {unpack} = row\n    return {line}\n\n\n'
+            f'def format_object(obj):\n    {unpack} = {attributes}\n    return {line}\n'
+        )
+
+    def format_rows(self, rows) -> str:
+        return ''.join(map(self.format_row, rows))
+
+    def format_objects(self, objects) -> str:
+        return ''.join(map(self.format_object, objects))
+
+
+SERIALIZERS = {
+    data_class: Serializer(data_class) for data_class in (Movie, Genre, Person, GenreFilmWork, PersonFilmWork)
+}
@@ -0,0 +1,97 @@
+import logging
+import time
+
+from psycopg2.extensions import connection as _connection
+
+log = logging.getLogger(__name__)
+
+DEFERRED_INDEX_TABLE = 'deferred_index'
+DEFERRED_INDEX_DDL = f'''
+CREATE TABLE IF NOT EXISTS {DEFERRED_INDEX_TABLE} (
+    index_name text PRIMARY KEY,
+    table_name text NOT NULL,
+    is_constraint boolean NOT NULL,
+    restore_sql text NOT NULL,
+    deferred_at timestamptz NOT NULL DEFAULT now()
+)
+'''
+TABLE_INDEXES_QUERY = '''
+SELECT t.relname,
+       quote_ident(ic.relname),
+       quote_ident(c.conname),
+       pg_get_indexdef(i.indexrelid),
+       pg_get_constraintdef(c.oid)
+FROM pg_index i
+JOIN pg_class t ON t.oid = i.indrelid
+JOIN pg_class ic ON ic.oid = i.indexrelid
+JOIN pg_namespace n ON n.oid = t.relnamespace
+LEFT JOIN pg_constraint c ON c.conindid = i.indexrelid AND c.conrelid = i.indrelid
+WHERE n.nspname = current_schema() AND t.relname = ANY(%s)
+'''
+
+
+def defer_indexes(pg_conn: _connection, tables, with_constraints=False) -> int:
+    """Удаляет вторичные индексы таблиц перед массовой загрузкой.
+
+    Определения сохраняются в таблицу deferred_index в той же транзакции, поэтому после
+    сбоя их можно восстановить следующим запуском. Индексы под ограничениями (первичные
+    ключи, unique constraint) удаляются только при with_constraints.
+    """
+
+    counter = 0
+    with pg_conn.cursor() as cursor:
+        cursor.execute(DEFERRED_INDEX_DDL)
+        cursor.execute(TABLE_INDEXES_QUERY, (list(tables),))
+        for table_name, index_name, constraint_name, index_def, constraint_def in cursor.fetchall():
+            if constraint_name is None:
+                restore_sql, drop_sql = index_def, f'DROP INDEX {index_name}'
+            elif with_constraints:
+                restore_sql = f'ALTER TABLE {table_name} ADD CONSTRAINT {constraint_name} {constraint_def}'
+                drop_sql = f'ALTER TABLE {table_name} DROP CONSTRAINT {constraint_name}'
+            else:
+                continue
+            cursor.execute(
+                f'INSERT INTO {DEFERRED_INDEX_TABLE} (index_name, table_name, is_constraint, restore_sql) '
+                'VALUES (%s, %s, %s, %s) ON CONFLICT (index_name) DO NOTHING',
+                (index_name, table_name, constraint_name is not None, restore_sql)
+            )
+            cursor.execute(drop_sql)
+            counter += 1
+    pg_conn.commit()
+    log.info('Отложено индексов и ограничений: %s', counter)
+    return counter
+
+
+def rebuild_indexes(pg_conn: _connection, maintenance_work_mem=None, parallel_workers=None):
+    """Восстанавливает отложенные индексы.
+
+    Сначала создаются первичные ключи, затем остальные индексы. Каждый индекс фиксируется
+    отдельной транзакцией, чтобы прерванное восстановление можно было продолжить.
+    """
+
+    with pg_conn.cursor() as cursor:
+        cursor.execute(DEFERRED_INDEX_DDL)
+        if maintenance_work_mem:
+            cursor.execute('SET maintenance_work_mem = %s', (maintenance_work_mem,))
+        if parallel_workers is not None:
+            cursor.execute('SET max_parallel_maintenance_workers = %s', (parallel_workers,))
+        cursor.execute(
+            f'SELECT index_name, table_name, restore_sql FROM {DEFERRED_INDEX_TABLE} '
+            'ORDER BY is_constraint DESC, index_name'
+        )
+        for index_name, table_name, restore_sql in cursor.fetchall():
+            started = time.monotonic()
+            cursor.execute(restore_sql)
+            cursor.execute(f'DELETE FROM {DEFERRED_INDEX_TABLE} WHERE index_name = %s', (index_name,))
+            pg_conn.commit()
+            log.info('Индекс %s на %s восстановлен за %.2f с', index_name, table_name, time.monotonic() - started)
+    pg_conn.commit()
+
+
+def analyze_tables(pg_conn: _connection, tables):
+    with pg_conn.cursor() as cursor:
+        for table_name in tables:
+            started = time.monotonic()
+            cursor.execute(f'ANALYZE {table_name}')
+            log.info('ANALYZE %s за %.2f с', table_name, time.monotonic() - started)
+    pg_conn.commit()
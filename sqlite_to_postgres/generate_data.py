@@ -0,0 +1,183 @@
+"""Генератор синтетической базы SQLite со схемой db.sqlite.
+
+Запуск из папки sqlite_to_postgres:
+python generate_data.py --films 1000000 --persons 300000 --genres-per-film 3 --persons-per-film 10 -o big.sqlite
+"""
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+log = logging.getLogger(__name__)
+logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                    level=logging.INFO)
+
+INSERT_BLOCK_SIZE = 10000
+ROLES = ('actor', 'director', 'writer')
+FILMWORK_TYPES = ('movie', 'tv_show')
+WORDS = (
+    'star', 'war', 'night', 'love', 'return', 'empire', 'dark', 'city', 'last', 'hope', 'dream', 'road',
+    'king', 'ghost', 'river', 'secret', 'life', 'world', 'time', 'fire', 'blood', 'storm', 'moon', 'game',
+)
+SQLITE_SCHEMA = '''
+CREATE TABLE genre (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    created_at timestamp with time zone,
+    updated_at timestamp with time zone
+);
+CREATE TABLE film_work (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT,
+    creation_date DATE,
+    certificate TEXT,
+    file_path TEXT,
+    rating FLOAT,
+    type TEXT not null,
+    created_at timestamp with time zone,
+    updated_at timestamp with time zone
+);
+CREATE TABLE person (
+    id TEXT PRIMARY KEY,
+    full_name TEXT NOT NULL,
+    birth_date DATE,
+    created_at timestamp with time zone,
+    updated_at timestamp with time zone
+);
+CREATE TABLE genre_film_work (
+    id TEXT PRIMARY KEY,
+    film_work_id TEXT NOT NULL,
+    genre_id TEXT NOT NULL,
+    created_at timestamp with time zone
+);
+CREATE UNIQUE INDEX film_work_genre ON genre_film_work (film_work_id, genre_id);
+CREATE TABLE person_film_work (
+    id TEXT PRIMARY KEY,
+    film_work_id TEXT NOT NULL,
+    person_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    created_at timestamp with time zone
+);
+CREATE UNIQUE INDEX film_work_person_role ON person_film_work (film_work_id, person_id, role);
+'''
+START = datetime(2021, 6, 16, tzinfo=timezone.utc)
+
+
+class Generator:
+    def __init__(self, seed: int):
+        self.random = random.Random(seed)
+
+    def uuid(self) -> str:
+        return str(uuid.UUID(int=self.random.getrandbits(128), version=4))
+
+    def timestamp(self) -> str:
+        moment = START + timedelta(
+            seconds=self.random.randrange(3600 * 24 * 365), microseconds=self.random.randrange(10 ** 6)
+        )
+        return moment.strftime('%Y-%m-%d %H:%M:%S.%f+00')
+
+    def date(self):
+        if self.random.random() < 0.5:
+            return None
+        return (date(1930, 1, 1) + timedelta(days=self.random.randrange(90 * 365))).isoformat()
+
+    def text(self, words: int) -> str:
+        return ' '.join(self.random.choices(WORDS, k=words)).capitalize()
+
+    def films(self, count: int):
+        for _ in range(count):
+            created_at = self.timestamp()
+            yield (
+                self.uuid(), self.text(self.random.randint(1, 5)),
+                self.text(self.random.randint(20, 60)) if self.random.random() < 0.8 else None,
+                self.date(), None, None, round(self.random.uniform(0, 10), 1),
+                self.random.choice(FILMWORK_TYPES), created_at, created_at,
+            )
+
+    def genres(self, count: int):
+        for number in range(count):
+            created_at = self.timestamp()
+            yield self.uuid(), f'Genre {number}', None, created_at, created_at
+
+    def persons(self, count: int):
+        for _ in range(count):
+            created_at = self.timestamp()
+            yield self.uuid(), self.text(2).title(), self.date(), created_at, created_at
+
+    def genre_links(self, film_ids: list, genre_ids: list, per_film: int):
+        per_film = min(per_film, len(genre_ids))
+        for film_id in film_ids:
+            for genre_id in self.random.sample(genre_ids, per_film):
+                yield self.uuid(), film_id, genre_id, self.timestamp()
+
+    def person_links(self, film_ids: list, person_ids: list, per_film: int):
+        per_film = min(per_film, len(person_ids))
+        for film_id in film_ids:
+            for person_id in self.random.sample(person_ids, per_film):
+                yield self.uuid(), film_id, person_id, self.random.choice(ROLES), self.timestamp()
+
+
+def insert_rows(conn: sqlite3.Connection, table_name: str, rows, ids: list = None) -> int:
+    columns = len(conn.execute(f'PRAGMA table_info({table_name})').fetchall())
+    query = f'INSERT INTO {table_name} VALUES ({", ".join("?" * columns)})'
+    counter = 0
+    started = time.monotonic()
+    block = []
+    for row in rows:
+        block.append(row)
+        if ids is not None:
+            ids.append(row[0])
+        if len(block) == INSERT_BLOCK_SIZE:
+            conn.executemany(query, block)
+            counter += len(block)
+            block = []
+    conn.executemany(query, block)
+    counter += len(block)
+    conn.commit()
+    log.info('%s: %s строк за %.2f с', table_name, counter, time.monotonic() - started)
+    return counter
+
+
+def generate(path: str, films: int, genres: int, persons: int, genres_per_film: int, persons_per_film: int,
+             seed: int = 0):
+    """Создаёт базу SQLite с пятью таблицами db.sqlite заданного размера"""
+
+    if os.path.exists(path):
+        os.remove(path)
+    generator = Generator(seed)
+    film_ids, genre_ids, person_ids = [], [], []
+    with sqlite3.connect(path) as conn:
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        conn.executescript(SQLITE_SCHEMA)
+        insert_rows(conn, 'film_work', generator.films(films), film_ids)
+        insert_rows(conn, 'genre', generator.genres(genres), genre_ids)
+        insert_rows(conn, 'person', generator.persons(persons), person_ids)
+        insert_rows(conn, 'genre_film_work', generator.genre_links(film_ids, genre_ids, genres_per_film))
+        insert_rows(conn, 'person_film_work', generator.person_links(film_ids, person_ids, persons_per_film))
+    conn.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Генератор синтетической базы SQLite')
+    parser.add_argument('-o', '--output', default='synthetic.sqlite', help='путь к создаваемому файлу')
+    parser.add_argument('--films', type=int, default=100000)
+    parser.add_argument('--genres', type=int, default=50)
+    parser.add_argument('--persons', type=int, default=50000)
+    parser.add_argument('--genres-per-film', type=int, default=3)
+    parser.add_argument('--persons-per-film', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    generate(
+        args.output, args.films, args.genres, args.persons, args.genres_per_film, args.persons_per_film, args.seed
+    )
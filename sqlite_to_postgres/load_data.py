@@ -1,14 +1,26 @@
+import argparse
 import io
 import logging
 import os
+import pathlib
 import sqlite3
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import closing
+from dataclasses import dataclass
 
 import psycopg2
 from dotenv import load_dotenv
 from psycopg2.extensions import connection as _connection
 from psycopg2.extras import DictCursor
 
-from data_classes import Movie, Person, Genre, GenreFilmWork, PersonFilmWork
+from binary_copy import BinaryCopyStream
+from copy_stream import COPY_BUFFER_SIZE, CopyStream
+from deferred_indexes import analyze_tables, defer_indexes, rebuild_indexes
+from pipeline import PipelinedLoader
+from validation import BlockValidator, RejectFile, ValidatingLoader
+from data_classes import SERIALIZERS, Movie, Person, Genre, GenreFilmWork, PersonFilmWork
 
 load_dotenv()
 
@@ -17,6 +29,7 @@ logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s
                     level=logging.INFO)
 
 BLOCK_SIZE = 100
+SQLITE_MMAP_SIZE = 1 << 30
 TABLES_TO_CLASSES = {
     'film_work': Movie,
     'genre': Genre,
@@ -24,16 +37,84 @@ TABLES_TO_CLASSES = {
     'genre_film_work': GenreFilmWork,
     'person_film_work': PersonFilmWork,
 }
+TABLE_DEPENDENCIES = {
+    'film_work': (),
+    'genre': (),
+    'person': (),
+    'genre_film_work': ('film_work', 'genre'),
+    'person_film_work': ('film_work', 'person'),
+}
+DEFER_AGGREGATES_SQL = 'SET content.defer_aggregates = on'
+WRITERS = ('blocks', 'stream')
+COPY_FORMATS = ('text', 'binary')
+SYNC_STATE_TABLE = 'sync_state'
+CHECKPOINT_TABLE = 'load_checkpoint'
+SERVICE_TABLES_DDL = (
+    f'''
+    CREATE TABLE IF NOT EXISTS {SYNC_STATE_TABLE} (
+        table_name text PRIMARY KEY,
+        mark text NOT NULL,
+        last_id text NOT NULL,
+        synced_at timestamptz NOT NULL DEFAULT now()
+    )
+    ''',
+    f'''
+    CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+        table_name text PRIMARY KEY,
+        last_rowid bigint NOT NULL,
+        saved_at timestamptz NOT NULL DEFAULT now()
+    )
+    ''',
+)
+
+
+@dataclass
+class LoadOptions:
+    writer: str = 'blocks'
+    copy_format: str = 'text'
+    incremental: bool = False
+    commit_every: int = 0
+    resume: bool = False
+    queue_depth: int = 0
+    reject_file: str = ''
+
+
+def mark_expression(data_class) -> str:
+    """Выражение SQLite для отметки синхронизации: updated_at, а для таблиц связей created_at"""
 
+    if 'updated_at' in data_class.__slots__:
+        return "COALESCE(updated_at, created_at, '')"
+    return "COALESCE(created_at, '')"
 
-class SQLiteLoader:
+
+class TableCursor:
     def __init__(self, connection, table_name, data_class, verbose=False):
         self.connection = connection
         self.cursor = self.connection.cursor()
         self.verbose = verbose
         self.table_name = table_name
         self.data_class = data_class
-        self.cursor.execute(f'SELECT * FROM {self.table_name}')
+        self.columns = ', '.join(data_class.__slots__)
+
+    def __del__(self):
+        self.cursor.close()
+
+
+class SQLiteLoader(TableCursor):
+    def __init__(self, connection, table_name, data_class, verbose=False, where='', params=(), after_rowid=None):
+        super().__init__(connection, table_name, data_class, verbose)
+        self.with_rowid = after_rowid is not None
+        self.row_offset = 1 if self.with_rowid else 0
+        self.last_rowid = after_rowid
+        if self.with_rowid:
+            where = ' AND '.join(filter(None, [where, 'rowid > ?']))
+            params = (*params, after_rowid)
+        query = f'SELECT {"rowid, " if self.with_rowid else ""}{self.columns} FROM {self.table_name}'
+        if where:
+            query += f' WHERE {where}'
+        if self.with_rowid:
+            query += ' ORDER BY rowid'
+        self.cursor.execute(query, params)
 
     def load_table(self):
 
@@ -44,53 +125,343 @@ class SQLiteLoader:
                 break
             block = []
             for row in block_rows:
-                data = self.data_class(*row)
+                data = self.data_class(*row[self.row_offset:])
                 block.append(data)
+            if self.with_rowid:
+                self.last_rowid = block_rows[-1][0]
             yield block
             counter += 1
 
         if self.verbose:
             log.info('Загружено: из %s %s блоков', self.table_name, counter)
 
-    def __del__(self):
-        self.cursor.close()
 
+class PostgresSaver(TableCursor):
 
-class PostgresSaver(SQLiteLoader):
+    def copy_block(self, block):
+        block_values = SERIALIZERS[self.data_class].format_objects(block)
+        with io.StringIO(block_values) as f:
+            self.cursor.copy_from(f, table=self.table_name, columns=self.data_class.__slots__, size=BLOCK_SIZE)
 
     def save_all_data(self, data):
         counter = 0
 
         for block in data:
-            block_values = '\n'.join([obj.get_values for obj in block])
-            with io.StringIO(block_values) as f:
-                self.cursor.copy_from(f, table=self.table_name, null='None', size=BLOCK_SIZE)
+            self.copy_block(block)
             counter += 1
 
         if self.verbose:
             log.info('В таблицу %s вставлено: %s блоков', self.table_name, counter)
 
+    def get_checkpoint(self) -> int:
+        self.cursor.execute(f'SELECT last_rowid FROM {CHECKPOINT_TABLE} WHERE table_name = %s', (self.table_name,))
+        row = self.cursor.fetchone()
+        return row[0] if row else 0
 
-def load_from_sqlite(sql_conn: sqlite3.Connection, psg_conn: _connection):
-    """Основной метод загрузки данных из SQLite в Postgres"""
+    def commit_checkpoint(self, last_rowid: int):
+        """Фиксирует транзакцию вместе с rowid последней перенесённой строки SQLite"""
+
+        self.cursor.execute(
+            f'INSERT INTO {CHECKPOINT_TABLE} (table_name, last_rowid) VALUES (%s, %s) '
+            'ON CONFLICT (table_name) DO UPDATE SET last_rowid = EXCLUDED.last_rowid, saved_at = now()',
+            (self.table_name, last_rowid)
+        )
+        self.connection.commit()
+
+    def save_with_checkpoints(self, sqlite_loader: SQLiteLoader, commit_every: int):
+        """Перенос блоками с фиксацией транзакции каждые commit_every блоков.
+
+        При сбое теряются только блоки после последней контрольной точки, а --resume
+        продолжает загрузку со следующего rowid.
+        """
+
+        counter = 0
+        for block in sqlite_loader.load_table():
+            self.copy_block(block)
+            counter += 1
+            if counter % commit_every == 0:
+                self.commit_checkpoint(sqlite_loader.last_rowid)
+        self.commit_checkpoint(sqlite_loader.last_rowid)
+
+        if self.verbose:
+            log.info(
+                'В таблицу %s вставлено: %s блоков, последний rowid %s',
+                self.table_name, counter, sqlite_loader.last_rowid
+            )
+
+    def save_stream(self, sqlite_cursor, copy_format='text', target=None):
+        """Перенос всей таблицы одним COPY прямо из курсора SQLite"""
+
+        sql = f'COPY {target or self.table_name} ({self.columns}) FROM STDIN'
+        if copy_format == 'binary':
+            stream = BinaryCopyStream(sqlite_cursor, self.data_class)
+            sql += ' WITH (FORMAT binary)'
+        else:
+            stream = CopyStream(sqlite_cursor, format_rows=SERIALIZERS[self.data_class].format_rows)
+        self.cursor.copy_expert(sql, stream, size=COPY_BUFFER_SIZE)
+
+        if self.verbose:
+            log.info('В таблицу %s вставлено: %s строк, %s байт', target or self.table_name, stream.rows, stream.sent)
+        return stream
+
+    def get_sync_mark(self) -> tuple:
+        self.cursor.execute(f'SELECT mark, last_id FROM {SYNC_STATE_TABLE} WHERE table_name = %s', (self.table_name,))
+        row = self.cursor.fetchone()
+        return tuple(row) if row else ('', '')
+
+    def upsert_stream(self, sqlite_cursor, mark: tuple, copy_format='text'):
+        """Загрузка изменённых строк через временную таблицу и INSERT ... ON CONFLICT (id) DO UPDATE.
+
+        Отметка синхронизации сохраняется в той же транзакции, что и данные.
+        """
+
+        staging = f'staging_{self.table_name}'
+        self.cursor.execute(f'CREATE TEMP TABLE {staging} (LIKE {self.table_name}) ON COMMIT DROP')
+        self.save_stream(sqlite_cursor, copy_format, target=staging)
+        updates = ', '.join([f'{column} = EXCLUDED.{column}' for column in self.data_class.__slots__[1:]])
+        self.cursor.execute(
+            f'INSERT INTO {self.table_name} ({self.columns}) SELECT {self.columns} FROM {staging} '
+            f'ON CONFLICT (id) DO UPDATE SET {updates}'
+        )
+        upserted = self.cursor.rowcount
+        self.cursor.execute(
+            f'INSERT INTO {SYNC_STATE_TABLE} (table_name, mark, last_id) VALUES (%s, %s, %s) '
+            'ON CONFLICT (table_name) DO UPDATE SET mark = EXCLUDED.mark, last_id = EXCLUDED.last_id, synced_at = now()',
+            (self.table_name, *mark)
+        )
+        self.cursor.execute(f'DROP TABLE {staging}')
+
+        if self.verbose:
+            log.info('В таблице %s добавлено или обновлено: %s строк', self.table_name, upserted)
+
+
+def refresh_aggregates(psg_conn: _connection):
+    """Пересчёт film_work_aggregate после полной загрузки, во время которой триггеры сводок отключены"""
+
+    started = time.monotonic()
+    with psg_conn.cursor() as cursor:
+        cursor.execute("SELECT to_regproc('refresh_film_work_aggregate')")
+        if cursor.fetchone()[0] is None:
+            return
+        cursor.execute('SELECT refresh_film_work_aggregate(ARRAY(SELECT id FROM film_work))')
+    psg_conn.commit()
+    log.info('Сводки по фильмам пересчитаны за %.2f с', time.monotonic() - started)
+
+
+def ensure_service_tables(psg_conn: _connection):
+    with psg_conn.cursor() as cursor:
+        for ddl in SERVICE_TABLES_DDL:
+            cursor.execute(ddl)
+    psg_conn.commit()
+
+
+def sync_table(sql_conn: sqlite3.Connection, psg_conn: _connection, table_name: str, options: LoadOptions):
+    """Инкрементальный перенос строк, изменённых после сохранённой отметки (mark, id)"""
+
+    data_class = TABLES_TO_CLASSES[table_name]
+    mark = mark_expression(data_class)
+    postgres_saver = PostgresSaver(psg_conn, table_name, data_class, verbose=True)
+    old_mark = postgres_saver.get_sync_mark()
+    new_mark = sql_conn.execute(
+        f'SELECT {mark}, id FROM {table_name} ORDER BY {mark} DESC, id DESC LIMIT 1'
+    ).fetchone()
+    if new_mark is None or new_mark <= old_mark:
+        log.info('Таблица %s: изменений нет', table_name)
+        return
+    sqlite_loader = SQLiteLoader(
+        sql_conn, table_name, data_class, verbose=True,
+        where=f'({mark}, id) > (?, ?) AND ({mark}, id) <= (?, ?)', params=(*old_mark, *new_mark)
+    )
+    postgres_saver.upsert_stream(sqlite_loader.cursor, new_mark, options.copy_format)
 
-    for table_name, data_class in TABLES_TO_CLASSES.items():
+
+def copy_table(sql_conn: sqlite3.Connection, psg_conn: _connection, table_name: str,
+               options: LoadOptions = LoadOptions()) -> float:
+    """Перенос одной таблицы, возвращает затраченное время в секундах"""
+
+    started = time.monotonic()
+    if options.incremental:
         try:
-            sqlite_loader = SQLiteLoader(sql_conn, table_name, data_class, verbose=True)
-            data = sqlite_loader.load_table()
+            sync_table(sql_conn, psg_conn, table_name, options)
         except Exception:
-            log.exception('An error occured while reading from SQLite')
-            break
+            log.exception('An error occurred while syncing table %s', table_name)
+            raise
+        elapsed = time.monotonic() - started
+        log.info('Таблица %s синхронизирована за %.2f с', table_name, elapsed)
+        return elapsed
+
+    data_class = TABLES_TO_CLASSES[table_name]
+    postgres_saver = PostgresSaver(psg_conn, table_name, data_class, verbose=True)
+    postgres_saver.cursor.execute(DEFER_AGGREGATES_SQL)
+    after_rowid = None
+    if options.commit_every:
+        after_rowid = postgres_saver.get_checkpoint() if options.resume else 0
+        if after_rowid:
+            log.info('Таблица %s: продолжение загрузки после rowid %s', table_name, after_rowid)
+    try:
+        sqlite_loader = SQLiteLoader(sql_conn, table_name, data_class, verbose=True, after_rowid=after_rowid)
+        if options.reject_file:
+            validator = BlockValidator.for_table(psg_conn, table_name, RejectFile(options.reject_file))
+            sqlite_loader = ValidatingLoader(sqlite_loader, validator)
+        if options.queue_depth:
+            sqlite_loader = PipelinedLoader(sqlite_loader, options.queue_depth)
+    except Exception:
+        log.exception('An error occured while reading from SQLite')
+        raise
+    try:
+        if options.commit_every:
+            postgres_saver.save_with_checkpoints(sqlite_loader, options.commit_every)
+        elif options.writer == 'stream':
+            postgres_saver.save_stream(sqlite_loader.cursor, options.copy_format)
+        else:
+            postgres_saver.save_all_data(sqlite_loader.load_table())
+    except Exception:
+        log.exception('An error occurred while writing to Postgres')
+        raise
+    elapsed = time.monotonic() - started
+    log.info('Таблица %s перенесена за %.2f с', table_name, elapsed)
+    return elapsed
+
+
+def load_from_sqlite(sql_conn: sqlite3.Connection, psg_conn: _connection, options: LoadOptions = LoadOptions()) -> bool:
+    """Основной метод загрузки данных из SQLite в Postgres"""
+
+    for table_name in TABLES_TO_CLASSES:
         try:
-            postgres_saver = PostgresSaver(psg_conn, table_name, data_class, verbose=True)
-            postgres_saver.save_all_data(data)
+            copy_table(sql_conn, psg_conn, table_name, options)
         except Exception:
-            log.exception('An error occurred while writing to Postgres')
-            break
+            # откат блоков после последней контрольной точки, иначе выход из with psycopg2.connect()
+            # зафиксирует их без сдвига контрольной точки и --resume загрузит их повторно
+            psg_conn.rollback()
+            return False
+    return True
 
 
-if __name__ == '__main__':
-    dsl = {
+def connect_readonly(sqlite_path: str) -> sqlite3.Connection:
+    """Соединение с файлом SQLite только для чтения.
+
+    immutable=1 отключает блокировки и проверку изменений файла другими процессами,
+    поэтому файл не должен меняться во время загрузки; mmap_size включает чтение
+    страниц через отображение файла в память вместо read() в кеш каждого соединения.
+    """
+
+    uri = f'{pathlib.Path(sqlite_path).resolve().as_uri()}?mode=ro&immutable=1'
+    connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    connection.execute(f'PRAGMA mmap_size = {SQLITE_MMAP_SIZE}')
+    return connection
+
+
+def rowid_ranges(sql_conn: sqlite3.Connection, table_name: str, partitions: int) -> list:
+    """Разбиение таблицы на не больше partitions диапазонов rowid (low, high] одинаковой длины"""
+
+    low, high = sql_conn.execute(f'SELECT min(rowid), max(rowid) FROM {table_name}').fetchone()
+    if low is None:
+        return []
+    low -= 1
+    step = -(-(high - low) // partitions)
+    return [(start, min(start + step, high)) for start in range(low, high, step)]
+
+
+def copy_range(sql_conn: sqlite3.Connection, psg_conn: _connection, table_name: str, low: int, high: int,
+               options: LoadOptions = LoadOptions()) -> float:
+    """Перенос строк таблицы с rowid из (low, high] отдельным COPY, возвращает затраченное время в секундах"""
+
+    started = time.monotonic()
+    data_class = TABLES_TO_CLASSES[table_name]
+    postgres_saver = PostgresSaver(psg_conn, table_name, data_class)
+    postgres_saver.cursor.execute(DEFER_AGGREGATES_SQL)
+    try:
+        sqlite_loader = SQLiteLoader(
+            sql_conn, table_name, data_class, where='rowid > ? AND rowid <= ?', params=(low, high)
+        )
+        if options.queue_depth:
+            sqlite_loader = PipelinedLoader(sqlite_loader, options.queue_depth)
+    except Exception:
+        log.exception('An error occured while reading from SQLite')
+        raise
+    try:
+        if options.writer == 'stream':
+            postgres_saver.save_stream(sqlite_loader.cursor, options.copy_format)
+        else:
+            postgres_saver.save_all_data(sqlite_loader.load_table())
+    except Exception:
+        log.exception('An error occurred while writing to Postgres')
+        raise
+    elapsed = time.monotonic() - started
+    log.info('Таблица %s: диапазон rowid (%s, %s] перенесён за %.2f с', table_name, low, high, elapsed)
+    return elapsed
+
+
+def copy_range_worker(sqlite_path: str, dsl: dict, table_name: str, low: int, high: int,
+                      options: LoadOptions) -> float:
+    """Перенос диапазона rowid в отдельном процессе; каждый диапазон фиксируется своей транзакцией"""
+
+    with closing(connect_readonly(sqlite_path)) as sqlite_conn, \
+            closing(psycopg2.connect(**dsl, cursor_factory=DictCursor)) as pg_conn:
+        with pg_conn:
+            return copy_range(sqlite_conn, pg_conn, table_name, low, high, options)
+
+
+def copy_table_worker(sqlite_path: str, dsl: dict, table_name: str, options: LoadOptions) -> float:
+    """Перенос таблицы в отдельном процессе со своими соединениями к SQLite и Postgres"""
+
+    with closing(sqlite3.connect(sqlite_path, check_same_thread=False)) as sqlite_conn, \
+            closing(psycopg2.connect(**dsl, cursor_factory=DictCursor)) as pg_conn:
+        with pg_conn:
+            return copy_table(sqlite_conn, pg_conn, table_name, options)
+
+
+def load_parallel(sqlite_path: str, dsl: dict, workers: int, options: LoadOptions = LoadOptions(),
+                  partitions: int = 1) -> bool:
+    """Параллельная загрузка таблиц пулом процессов.
+
+    Таблицы связей запускаются только после успешной загрузки родительских таблиц
+    из TABLE_DEPENDENCIES. При partitions больше 1 каждая таблица делится на
+    диапазоны rowid, которые читаются и копируются в Postgres разными процессами,
+    так что одна большая таблица тоже загружается на всех ядрах.
+    """
+
+    pending = dict(TABLE_DEPENDENCIES)
+    done, failed = set(), set()
+    running = {}
+    remaining = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            for table_name, parents in list(pending.items()):
+                if failed.intersection(parents):
+                    log.error('Таблица %s пропущена: не загружены родительские таблицы', table_name)
+                    failed.add(table_name)
+                    del pending[table_name]
+                elif done.issuperset(parents):
+                    del pending[table_name]
+                    if partitions > 1:
+                        with closing(connect_readonly(sqlite_path)) as sqlite_conn:
+                            ranges = rowid_ranges(sqlite_conn, table_name, partitions)
+                        futures = [
+                            executor.submit(copy_range_worker, sqlite_path, dsl, table_name, low, high, options)
+                            for low, high in ranges
+                        ]
+                    else:
+                        futures = [executor.submit(copy_table_worker, sqlite_path, dsl, table_name, options)]
+                    if not futures:
+                        done.add(table_name)
+                    remaining[table_name] = len(futures)
+                    running.update(dict.fromkeys(futures, table_name))
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                table_name = running.pop(future)
+                remaining[table_name] -= 1
+                if future.exception() is not None:
+                    failed.add(table_name)
+                elif not remaining[table_name] and table_name not in failed:
+                    done.add(table_name)
+    return not failed
+
+
+def get_dsl() -> dict:
+    return {
         'dbname': os.getenv('DB_NAME'),
         'user': os.getenv('POSTGRES_USER'),
         'password': os.getenv('POSTGRES_PASSWORD'),
@@ -98,8 +469,137 @@ if __name__ == '__main__':
         'port': int(os.getenv('DB_PORT')),
         'options': '-c search_path=content'
     }
-    with sqlite3.connect('db.sqlite') as sqlite_conn, psycopg2.connect(**dsl, cursor_factory=DictCursor) as pg_conn:
-        load_from_sqlite(sqlite_conn, pg_conn)
 
-    sqlite_conn.close()
-    pg_conn.close()
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--sqlite', default='db.sqlite', help='путь к файлу SQLite')
+    parser.add_argument(
+        '-w', '--workers', type=int, default=1,
+        help='число параллельных процессов, 1 - последовательная загрузка в одном соединении'
+    )
+    parser.add_argument(
+        '--partitions', type=int, default=1, metavar='N',
+        help='делить каждую таблицу на N диапазонов rowid, которые загружаются параллельно (требует --workers)'
+    )
+    parser.add_argument(
+        '--writer', choices=WRITERS, default='blocks',
+        help='blocks - пачками по BLOCK_SIZE через dataclass, stream - вся таблица одним потоковым COPY'
+    )
+    parser.add_argument(
+        '--incremental', action='store_true',
+        help='переносить только строки, изменённые после прошлой синхронизации, через INSERT ... ON CONFLICT'
+    )
+    parser.add_argument(
+        '--commit-every', type=int, default=0, metavar='N',
+        help='фиксировать транзакцию и контрольную точку каждые N блоков (только --writer blocks)'
+    )
+    parser.add_argument(
+        '--queue-depth', type=int, default=0, metavar='N',
+        help='читать SQLite в отдельном потоке, держа в очереди не больше N блоков (только --writer blocks)'
+    )
+    parser.add_argument(
+        '--validate', action='store_true',
+        help='проверять блоки перед COPY и писать отклонённые строки в --reject-file (только --writer blocks)'
+    )
+    parser.add_argument(
+        '--reject-file', default='rejects.jsonl',
+        help='файл отклонённых строк в формате JSON Lines для --validate'
+    )
+    parser.add_argument(
+        '--resume', action='store_true',
+        help='продолжить прерванную загрузку с последней контрольной точки'
+    )
+    parser.add_argument(
+        '--defer-indexes', action='store_true',
+        help='удалить вторичные индексы перед загрузкой и создать их заново после, затем ANALYZE'
+    )
+    parser.add_argument(
+        '--defer-primary-keys', action='store_true',
+        help='вместе с --defer-indexes откладывать и первичные ключи'
+    )
+    parser.add_argument(
+        '--maintenance-work-mem', metavar='SIZE',
+        help='maintenance_work_mem для построения индексов, например 1GB'
+    )
+    parser.add_argument(
+        '--index-workers', type=int, metavar='N',
+        help='max_parallel_maintenance_workers для параллельного построения индексов'
+    )
+    parser.add_argument(
+        '--format', dest='copy_format', choices=COPY_FORMATS, default='text',
+        help='формат COPY для --writer stream'
+    )
+
+
+def check_arguments(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    if args.copy_format == 'binary' and args.writer != 'stream' and not args.incremental:
+        parser.error('--format binary работает только с --writer stream или --incremental')
+    if args.commit_every and (args.writer != 'blocks' or args.incremental):
+        parser.error('--commit-every работает только с --writer blocks без --incremental')
+    if args.queue_depth and (args.writer != 'blocks' or args.incremental):
+        parser.error('--queue-depth работает только с --writer blocks без --incremental')
+    if args.validate and (args.writer != 'blocks' or args.incremental):
+        parser.error('--validate работает только с --writer blocks без --incremental')
+    if args.partitions > 1 and args.workers < 2:
+        parser.error('--partitions требует --workers больше 1')
+    if args.partitions > 1 and (args.incremental or args.commit_every or args.validate):
+        parser.error('--partitions не работает с --incremental, --commit-every и --validate')
+    if args.resume and not args.commit_every:
+        parser.error('--resume требует --commit-every')
+    if args.defer_primary_keys and not args.defer_indexes:
+        parser.error('--defer-primary-keys требует --defer-indexes')
+    if args.defer_primary_keys and args.incremental:
+        parser.error('--incremental использует первичные ключи в ON CONFLICT, их нельзя откладывать')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Перенос данных из SQLite в Postgres')
+    add_arguments(parser)
+    args = parser.parse_args()
+    check_arguments(parser, args)
+    return args
+
+
+def run(args: argparse.Namespace, dsl: dict) -> bool:
+    """Загрузка с параметрами командной строки, возвращает True, если все таблицы перенесены"""
+
+    options = LoadOptions(
+        writer=args.writer, copy_format=args.copy_format, incremental=args.incremental,
+        commit_every=args.commit_every, resume=args.resume, queue_depth=args.queue_depth,
+        reject_file=args.reject_file if args.validate else ''
+    )
+    if options.reject_file and not options.resume:
+        RejectFile(options.reject_file).truncate()
+    if options.incremental or options.commit_every:
+        with closing(psycopg2.connect(**dsl)) as pg_conn:
+            ensure_service_tables(pg_conn)
+    started = time.monotonic()
+    if args.defer_indexes:
+        with closing(psycopg2.connect(**dsl)) as pg_conn:
+            defer_indexes(pg_conn, TABLES_TO_CLASSES, with_constraints=args.defer_primary_keys)
+    if args.workers > 1:
+        loaded = load_parallel(args.sqlite, dsl, args.workers, options, args.partitions)
+    else:
+        with sqlite3.connect(args.sqlite, check_same_thread=False) as sqlite_conn, \
+                psycopg2.connect(**dsl, cursor_factory=DictCursor) as pg_conn:
+            loaded = load_from_sqlite(sqlite_conn, pg_conn, options)
+
+        sqlite_conn.close()
+        pg_conn.close()
+    if args.defer_indexes and loaded:
+        with closing(psycopg2.connect(**dsl)) as pg_conn:
+            rebuild_indexes(pg_conn, args.maintenance_work_mem, args.index_workers)
+            analyze_tables(pg_conn, TABLES_TO_CLASSES)
+    elif args.defer_indexes:
+        log.warning('Загрузка не завершена, отложенные индексы не восстановлены: они будут созданы следующим запуском')
+    if loaded and not options.incremental:
+        with closing(psycopg2.connect(**dsl)) as pg_conn:
+            refresh_aggregates(pg_conn)
+    if options.reject_file:
+        RejectFile(options.reject_file).log_summary()
+    log.info('Загрузка завершена за %.2f с', time.monotonic() - started)
+    return loaded
+
+
+if __name__ == '__main__':
+    sys.exit(0 if run(parse_args(), get_dsl()) else 1)
@@ -0,0 +1,74 @@
+import logging
+import queue
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+DONE = object()
+
+
+class PipelinedLoader:
+    """Чтение блоков SQLiteLoader в отдельном потоке через очередь ограниченной длины.
+
+    Пока основной поток ждёт ответа Postgres на COPY, поток чтения готовит следующие
+    блоки. Длина очереди ограничивает число блоков в памяти. Интерфейс совпадает с
+    SQLiteLoader: load_table() и last_rowid, который относится к последнему блоку,
+    отданному на запись, а не прочитанному.
+    """
+
+    def __init__(self, sqlite_loader, depth: int):
+        self.sqlite_loader = sqlite_loader
+        self.table_name = sqlite_loader.table_name
+        self.last_rowid = sqlite_loader.last_rowid
+        self.queue = queue.Queue(maxsize=depth)
+        self.stopped = threading.Event()
+        self.error = None
+        self.reader_blocked = 0.0
+        self.writer_blocked = 0.0
+
+    def put(self, item):
+        started = time.perf_counter()
+        self.queue.put(item)
+        self.reader_blocked += time.perf_counter() - started
+
+    def produce(self):
+        try:
+            for block in self.sqlite_loader.load_table():
+                if self.stopped.is_set():
+                    break
+                self.put((block, self.sqlite_loader.last_rowid))
+        except Exception as error:
+            self.error = error
+        finally:
+            self.put(DONE)
+
+    def drain(self, reader: threading.Thread):
+        while reader.is_alive():
+            try:
+                self.queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+    def load_table(self):
+        reader = threading.Thread(target=self.produce, name=f'reader-{self.table_name}', daemon=True)
+        reader.start()
+        try:
+            while True:
+                started = time.perf_counter()
+                item = self.queue.get()
+                self.writer_blocked += time.perf_counter() - started
+                if item is DONE:
+                    break
+                block, self.last_rowid = item
+                yield block
+        finally:
+            self.stopped.set()
+            self.drain(reader)
+            reader.join()
+        if self.error is not None:
+            raise self.error
+        log.info(
+            'Таблица %s: чтение ждало место в очереди %.2f с, запись ждала данные %.2f с',
+            self.table_name, self.reader_blocked, self.writer_blocked
+        )
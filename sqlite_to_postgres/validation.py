@@ -0,0 +1,262 @@
+import json
+import logging
+import os
+import uuid
+from collections import Counter
+from datetime import date, timedelta
+
+from psycopg2.extensions import connection as _connection
+
+log = logging.getLogger(__name__)
+
+KEY_FETCH_SIZE = 50000
+RATING_RANGE = (0, 10)
+REQUIRED_COLUMNS = {
+    'film_work': ('title',),
+    'genre': ('name',),
+    'person': ('full_name',),
+    'genre_film_work': ('film_work_id', 'genre_id'),
+    'person_film_work': ('film_work_id', 'person_id', 'role'),
+}
+UNIQUE_KEYS = {
+    'genre_film_work': ('film_work_id', 'genre_id'),
+    'person_film_work': ('film_work_id', 'person_id', 'role'),
+}
+FOREIGN_KEYS = {
+    'genre_film_work': {'film_work_id': 'film_work', 'genre_id': 'genre'},
+    'person_film_work': {'film_work_id': 'film_work', 'person_id': 'person'},
+}
+DATE_COLUMNS = ('creation_date', 'birth_date', 'created_at', 'updated_at')
+
+
+def date_ranges() -> dict:
+    """Допустимые границы дат: фильмы не раньше 1870 года и не позже чем через 10 лет, остальное не в будущем"""
+
+    today = date.today()
+    return {
+        'creation_date': (date(1870, 1, 1), today + timedelta(days=3650)),
+        'birth_date': (date.min, today),
+        'created_at': (date(1970, 1, 1), today + timedelta(days=1)),
+        'updated_at': (date(1970, 1, 1), today + timedelta(days=1)),
+    }
+
+
+def is_uuid(value) -> bool:
+    try:
+        uuid.UUID(value)
+    except (ValueError, TypeError, AttributeError):
+        return False
+    return True
+
+
+def in_date_range(value, low: date, high: date) -> bool:
+    """Дата или начало метки времени в формате ISO попадает в [low, high]"""
+
+    try:
+        return low <= date.fromisoformat(str(value)[:10]) <= high
+    except ValueError:
+        return False
+
+
+def in_rating_range(value) -> bool:
+    try:
+        return RATING_RANGE[0] <= float(value) <= RATING_RANGE[1]
+    except (ValueError, TypeError):
+        return False
+
+
+def row_values(obj) -> dict:
+    return {column: getattr(obj, column) for column in obj.__slots__}
+
+
+class RejectFile:
+    """Файл отклонённых строк в формате JSON Lines: таблица, причина и сама строка.
+
+    Отклонённые строки блока дописываются одним вызовом write в режиме O_APPEND,
+    поэтому в файл могут писать несколько процессов параллельной загрузки.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def truncate(self):
+        open(self.path, 'w').close()
+
+    def write(self, table_name: str, reason: str, rows: list):
+        data = ''.join(
+            json.dumps({'table': table_name, 'reason': reason, 'row': row_values(obj)}, ensure_ascii=False) + '\n'
+            for obj in rows
+        ).encode()
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+
+    def summary(self) -> Counter:
+        """Число отклонённых строк по (таблица, причина)"""
+
+        counts = Counter()
+        if not os.path.exists(self.path):
+            return counts
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                reject = json.loads(line)
+                counts[reject['table'], reject['reason']] += 1
+        return counts
+
+    def log_summary(self):
+        counts = self.summary()
+        if not counts:
+            log.info('Отклонённых строк нет')
+            return
+        for (table_name, reason), count in sorted(counts.items()):
+            log.warning('Отклонено в %s: %s - %s строк', table_name, reason, count)
+        log.warning('Всего отклонено %s строк, см. %s', sum(counts.values()), self.path)
+
+
+def fetch_keys(psg_conn: _connection, table_name: str, columns) -> set:
+    """Множество значений columns уже загруженных строк таблицы Postgres"""
+
+    select = ', '.join([f'{column}::text' for column in columns])
+    keys = set()
+    with psg_conn.cursor(name=f'keys_{table_name}') as cursor:
+        cursor.itersize = KEY_FETCH_SIZE
+        cursor.execute(f'SELECT {select} FROM {table_name}')
+        for row in cursor:
+            keys.add(row[0] if len(columns) == 1 else tuple(row))
+    return keys
+
+
+class BlockValidator:
+    """Проверка блока строк одной таблицы целиком перед COPY.
+
+    Каждая проверка проходит по колонке всего блока и возвращает номера плохих строк;
+    строка отклоняется по первой не пройденной проверке. Внешние ключи проверяются
+    по множествам id родительских таблиц, а повторы id и уникальных ключей - по
+    множествам уже принятых значений, которые начинаются со строк, уже лежащих в
+    Postgres, поэтому продолжение загрузки с --resume тоже не создаёт дублей.
+    """
+
+    def __init__(self, table_name: str, rejects: RejectFile, parent_ids: dict, seen_ids: set, seen_keys: set):
+        self.table_name = table_name
+        self.rejects = rejects
+        self.parent_ids = parent_ids
+        self.seen_ids = seen_ids
+        self.seen_keys = seen_keys
+        self.unique_key = UNIQUE_KEYS.get(table_name)
+        self.checks = None
+        self.accepted = 0
+        self.rejected = Counter()
+
+    @classmethod
+    def for_table(cls, psg_conn: _connection, table_name: str, rejects: RejectFile) -> 'BlockValidator':
+        foreign_keys = FOREIGN_KEYS.get(table_name, {})
+        parent_ids = {parent: fetch_keys(psg_conn, parent, ('id',)) for parent in set(foreign_keys.values())}
+        unique_key = UNIQUE_KEYS.get(table_name)
+        seen_keys = fetch_keys(psg_conn, table_name, unique_key) if unique_key else set()
+        return cls(table_name, rejects, parent_ids, fetch_keys(psg_conn, table_name, ('id',)), seen_keys)
+
+    def build_checks(self, slots) -> list:
+        """Пары (причина, проверка блока); проверка возвращает номера плохих строк"""
+
+        checks = [('invalid_id', lambda block: [i for i, obj in enumerate(block) if not is_uuid(obj.id)])]
+        for column in REQUIRED_COLUMNS.get(self.table_name, ()):
+            checks.append((f'missing_{column}', self.missing_check(column)))
+        for column, parent in FOREIGN_KEYS.get(self.table_name, {}).items():
+            checks.append((f'unknown_{column}', self.foreign_key_check(column, self.parent_ids[parent])))
+        if 'rating' in slots:
+            checks.append(('rating_out_of_range', lambda block: [
+                i for i, obj in enumerate(block) if obj.rating is not None and not in_rating_range(obj.rating)
+            ]))
+        ranges = date_ranges()
+        for column in DATE_COLUMNS:
+            if column in slots:
+                checks.append((f'{column}_out_of_range', self.date_check(column, *ranges[column])))
+        # проверки уникальности идут последними и запоминают ключи только тех строк,
+        # которые прошли все остальные проверки
+        checks.append(('duplicate_id', lambda block: self.duplicates([obj.id for obj in block], self.seen_ids)))
+        if self.unique_key:
+            checks.append(('duplicate_key', lambda block: self.duplicates(
+                [tuple(getattr(obj, column) for column in self.unique_key) for obj in block], self.seen_keys
+            )))
+        return checks
+
+    @staticmethod
+    def missing_check(column: str):
+        return lambda block: [i for i, obj in enumerate(block) if not getattr(obj, column)]
+
+    @staticmethod
+    def foreign_key_check(column: str, parent_ids: set):
+        def check(block):
+            missing = {getattr(obj, column) for obj in block} - parent_ids
+            if not missing:
+                return []
+            return [i for i, obj in enumerate(block) if getattr(obj, column) in missing]
+        return check
+
+    @staticmethod
+    def date_check(column: str, low: date, high: date):
+        return lambda block: [
+            i for i, obj in enumerate(block)
+            if getattr(obj, column) is not None and not in_date_range(getattr(obj, column), low, high)
+        ]
+
+    @staticmethod
+    def duplicates(keys: list, seen: set) -> list:
+        """Номера повторов: ключ уже встречался в прошлых блоках или раньше в этом блоке"""
+
+        fresh = set(keys) - seen
+        seen.update(fresh)
+        bad = []
+        for i, key in enumerate(keys):
+            if key in fresh:
+                fresh.discard(key)
+            else:
+                bad.append(i)
+        return bad
+
+    def validate(self, block: list) -> list:
+        """Принятые строки блока; отклонённые пишутся в файл отказов"""
+
+        if self.checks is None:
+            self.checks = self.build_checks(block[0].__slots__)
+        for reason, check in self.checks:
+            if not block:
+                break
+            bad = set(check(block))
+            if not bad:
+                continue
+            self.rejects.write(self.table_name, reason, [block[i] for i in sorted(bad)])
+            self.rejected[reason] += len(bad)
+            block = [obj for i, obj in enumerate(block) if i not in bad]
+        self.accepted += len(block)
+        return block
+
+    def log_summary(self):
+        rejected = sum(self.rejected.values())
+        details = ', '.join(f'{reason}: {count}' for reason, count in self.rejected.most_common())
+        log.info(
+            'Таблица %s: принято %s строк, отклонено %s%s',
+            self.table_name, self.accepted, rejected, f' ({details})' if details else ''
+        )
+
+
+class ValidatingLoader:
+    """Этап проверки между SQLiteLoader и PostgresSaver с тем же интерфейсом, что у SQLiteLoader"""
+
+    def __init__(self, sqlite_loader, validator: BlockValidator):
+        self.sqlite_loader = sqlite_loader
+        self.validator = validator
+        self.table_name = sqlite_loader.table_name
+
+    @property
+    def last_rowid(self):
+        return self.sqlite_loader.last_rowid
+
+    def load_table(self):
+        for block in self.sqlite_loader.load_table():
+            block = self.validator.validate(block)
+            if block:
+                yield block
+        self.validator.log_summary()